@@ -0,0 +1,63 @@
+def user_data(user):
+    return {'id': user.id, 'username': user.username}
+
+
+def group_data(group):
+    if group is None:
+        return None
+    return {'slug': group.slug, 'title': group.title}
+
+
+def renditions_data(post):
+    return [
+        {
+            'width': rendition.width,
+            'height': rendition.height,
+            'format': rendition.format,
+            'url': rendition.file.url,
+        }
+        for rendition in post.renditions.all()
+    ]
+
+
+# Поле ответа -> как получить его из объекта. Связанные объекты
+# (author, group, renditions) должны быть выбраны заранее: queries.py
+# присоединяет их только если поле запрошено.
+POST_FIELDS = {
+    'id': lambda post: post.id,
+    'text': lambda post: post.text,
+    'pub_date': lambda post: post.pub_date,
+    'updated': lambda post: post.updated,
+    'author': lambda post: user_data(post.author),
+    'group': lambda post: group_data(post.group),
+    'image': lambda post: post.image.url if post.image else None,
+    'renditions': renditions_data,
+}
+COMMENT_FIELDS = {
+    'id': lambda comment: comment.id,
+    'post': lambda comment: comment.post_id,
+    'author': lambda comment: user_data(comment.author),
+    'text': lambda comment: comment.text,
+    'created': lambda comment: comment.created,
+}
+GROUP_FIELDS = {
+    'slug': lambda group: group.slug,
+    'title': lambda group: group.title,
+    'description': lambda group: group.description,
+}
+USER_FIELDS = {
+    'id': lambda user: user.id,
+    'username': lambda user: user.username,
+    'posts_count': lambda user: user.stats.posts_count,
+    'followers_count': lambda user: user.stats.followers_count,
+    'following_count': lambda user: user.stats.following_count,
+    'comments_count': lambda user: user.stats.comments_count,
+}
+
+
+def serialize(obj, getters, fields=None):
+    return {
+        name: getter(obj)
+        for name, getter in getters.items()
+        if fields is None or name in fields
+    }
@@ -0,0 +1,104 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+
+POSTS = reverse('api:posts')
+FEED = reverse('api:feed')
+FOLLOWS = reverse('api:follows')
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='danil')
+        cls.reader = User.objects.create(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author, group=cls.group, text=f'Пост {index}'
+            )
+            for index in range(3)
+        ]
+        Comment.objects.create(
+            post=cls.posts[0], author=cls.reader, text='Комментарий'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.guest = Client()
+        cls.authorized = Client()
+        cls.authorized.force_login(cls.reader)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_list_with_embedded_relations(self):
+        """Автор и группа приходят в самом списке, курсор ведет дальше."""
+        response = self.guest.get(POSTS, {'limit': 2})
+        data = response.json()
+        self.assertEqual(
+            [post['text'] for post in data['results']], ['Пост 2', 'Пост 1']
+        )
+        self.assertEqual(
+            data['results'][0]['author'],
+            {'id': self.author.id, 'username': 'danil'}
+        )
+        self.assertEqual(data['results'][0]['group']['slug'], 'test-slug')
+        self.assertIsNone(data['previous'])
+        data = self.guest.get(data['next']).json()
+        self.assertEqual(
+            [post['text'] for post in data['results']], ['Пост 0']
+        )
+        self.assertIsNone(data['next'])
+
+    def test_sparse_fields_skip_joins(self):
+        """Без связанных полей в запросе нет JOIN и подгрузки."""
+        self.guest.get(POSTS)
+        cache.clear()
+        with self.assertNumQueries(1) as context:
+            response = self.guest.get(POSTS, {'fields': 'id,text'})
+        self.assertEqual(set(response.json()['results'][0]), {'id', 'text'})
+        self.assertNotIn('JOIN', context.captured_queries[-1]['sql'])
+        response = self.guest.get(POSTS, {'fields': 'id,secret'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_etag(self):
+        url = reverse('api:post', args=(self.posts[0].id,))
+        etag = self.guest.get(url)['ETag']
+        self.assertEqual(
+            self.guest.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304
+        )
+        Comment.objects.create(
+            post=self.posts[0], author=self.author, text='Ответ'
+        )
+        self.assertEqual(
+            self.guest.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200
+        )
+
+    def test_errors(self):
+        self.assertEqual(
+            self.guest.get(reverse('api:post', args=(0,))).json(),
+            {'detail': 'Не найдено'}
+        )
+        self.assertEqual(self.guest.get(FEED).status_code, 401)
+        self.assertEqual(self.authorized.post(POSTS).status_code, 405)
+
+    def test_feed_and_follows(self):
+        self.assertEqual(
+            len(self.authorized.get(FEED).json()['results']), 3
+        )
+        self.assertEqual(
+            self.authorized.get(FOLLOWS).json()['results'],
+            [{'id': self.author.id, 'username': 'danil'}]
+        )
+        comments = self.guest.get(
+            reverse('api:post_comments', args=(self.posts[0].id,))
+        ).json()['results']
+        self.assertEqual(comments[0]['author']['username'], 'reader')
+        user = self.guest.get(reverse('api:user', args=('danil',))).json()
+        self.assertEqual(user['posts_count'], 3)
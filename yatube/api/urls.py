@@ -0,0 +1,29 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'api'
+
+urlpatterns = [
+    path('v1/posts/', views.posts, name='posts'),
+    path('v1/posts/<int:post_id>/', views.post, name='post'),
+    path(
+        'v1/posts/<int:post_id>/comments/',
+        views.post_comments,
+        name='post_comments'
+    ),
+    path('v1/groups/', views.groups, name='groups'),
+    path(
+        'v1/groups/<slug:slug>/posts/',
+        views.group_posts,
+        name='group_posts'
+    ),
+    path('v1/users/<str:username>/', views.user, name='user'),
+    path(
+        'v1/users/<str:username>/posts/',
+        views.user_posts,
+        name='user_posts'
+    ),
+    path('v1/feed/', views.feed, name='feed'),
+    path('v1/follows/', views.follows, name='follows'),
+]
@@ -0,0 +1,183 @@
+from functools import partial, wraps
+from urllib.parse import urlencode
+
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+
+from posts.cache import conditional_page
+from posts.models import Group, Post, User
+from posts.queries import (
+    POSTS_PER_PAGE, author_post_list, comments_page, cursor_page, feed_page,
+    feed_state, follows_state, get_author, group_post_list, group_state,
+    index_state, post_list, post_state, profile_state,
+)
+
+from .serializers import (
+    COMMENT_FIELDS, GROUP_FIELDS, POST_FIELDS, USER_FIELDS, serialize,
+    user_data,
+)
+
+MAX_LIMIT = 100
+
+
+class ApiError(Exception):
+    def __init__(self, status, detail):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+
+def api_view(view):
+    """Только чтение; ошибки отдаются JSON-объектом с полем detail."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return JsonResponse(
+                {'detail': 'Метод не поддерживается'}, status=405
+            )
+        try:
+            return view(request, *args, **kwargs)
+        except Http404:
+            return JsonResponse({'detail': 'Не найдено'}, status=404)
+        except ApiError as error:
+            return JsonResponse({'detail': error.detail}, status=error.status)
+    return wrapper
+
+
+def requested_fields(request, getters):
+    """Поля из ?fields=a,b; без параметра - все."""
+    raw = request.GET.get('fields')
+    if not raw:
+        return None
+    fields = {name.strip() for name in raw.split(',') if name.strip()}
+    unknown = fields - set(getters)
+    if unknown:
+        raise ApiError(
+            400, 'Неизвестные поля: ' + ', '.join(sorted(unknown))
+        )
+    return fields
+
+
+def requested_limit(request, default=POSTS_PER_PAGE):
+    try:
+        limit = int(request.GET.get('limit', default))
+    except ValueError:
+        raise ApiError(400, 'limit должен быть числом')
+    return max(1, min(limit, MAX_LIMIT))
+
+
+def page_url(request, **cursor):
+    params = request.GET.copy()
+    for key in ('after', 'before'):
+        params.pop(key, None)
+    params.update(cursor)
+    return f'{request.path}?{urlencode(sorted(params.items()))}'
+
+
+def page_response(request, page, getters, fields):
+    return JsonResponse({
+        'results': [serialize(obj, getters, fields) for obj in page],
+        'next': page.next_cursor and page_url(
+            request, after=page.next_cursor
+        ),
+        'previous': page.previous_cursor and page_url(
+            request, before=page.previous_cursor
+        ),
+    })
+
+
+def posts_response(request, queryset_for):
+    """Страница постов; queryset_for(fields) выбирает только нужные связи."""
+    fields = requested_fields(request, POST_FIELDS)
+    page = cursor_page(
+        queryset_for(fields), request, per_page=requested_limit(request)
+    )
+    return page_response(request, page, POST_FIELDS, fields)
+
+
+@api_view
+@conditional_page(index_state)
+def posts(request):
+    return posts_response(request, post_list)
+
+
+@api_view
+@conditional_page(post_state)
+def post(request, post_id):
+    fields = requested_fields(request, POST_FIELDS)
+    return JsonResponse(serialize(
+        get_object_or_404(post_list(fields), id=post_id), POST_FIELDS, fields
+    ))
+
+
+@api_view
+@conditional_page(post_state)
+def post_comments(request, post_id):
+    fields = requested_fields(request, COMMENT_FIELDS)
+    page = comments_page(
+        get_object_or_404(Post.objects.only('id'), id=post_id),
+        request,
+        per_page=requested_limit(request)
+    )
+    return page_response(request, page, COMMENT_FIELDS, fields)
+
+
+@api_view
+@conditional_page(index_state)
+def groups(request):
+    fields = requested_fields(request, GROUP_FIELDS)
+    return JsonResponse({'results': [
+        serialize(group, GROUP_FIELDS, fields)
+        for group in Group.objects.order_by('title')
+    ]})
+
+
+@api_view
+@conditional_page(group_state)
+def group_posts(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return posts_response(request, partial(group_post_list, group))
+
+
+@api_view
+@conditional_page(profile_state)
+def user(request, username):
+    fields = requested_fields(request, USER_FIELDS)
+    return JsonResponse(
+        serialize(get_author(username), USER_FIELDS, fields)
+    )
+
+
+@api_view
+@conditional_page(profile_state)
+def user_posts(request, username):
+    author = get_object_or_404(User, username=username)
+    return posts_response(request, partial(author_post_list, author))
+
+
+@api_view
+@conditional_page(feed_state)
+def feed(request):
+    if not request.user.is_authenticated:
+        raise ApiError(401, 'Нужна авторизация')
+    fields = requested_fields(request, POST_FIELDS)
+    page = feed_page(
+        request.user,
+        request,
+        paginate=partial(cursor_page, per_page=requested_limit(request)),
+        fields=fields
+    )
+    return page_response(request, page, POST_FIELDS, fields)
+
+
+@api_view
+@conditional_page(follows_state)
+def follows(request):
+    if not request.user.is_authenticated:
+        raise ApiError(401, 'Нужна авторизация')
+    return JsonResponse({'results': [
+        user_data(follow.author)
+        for follow in request.user.follower.select_related(
+            'author'
+        ).order_by('author__username')
+    ]})
@@ -0,0 +1,235 @@
+import asyncio
+import contextvars
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from functools import partial
+
+import django
+from django.conf import settings
+from django.core import signals
+from django.core.handlers import base
+from django.core.handlers.wsgi import WSGIRequest
+from django.urls import Resolver404, get_resolver, set_script_prefix
+from django.utils.module_loading import import_string
+
+from . import metrics
+
+# Эти middleware только дописывают заголовки, поэтому их process_response
+# можно применить и к ответам асинхронных вариантов, минуя цепочку.
+HEADER_MIDDLEWARE = (
+    'django.middleware.security.SecurityMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+)
+BODY_SPOOL_SIZE = 2 ** 20
+END = object()
+
+_executor = ContextVar('asgi_executor', default=None)
+
+
+def run_sync(func, *args, **kwargs):
+    """Выполняет func в пуле потоков обработчика, не занимая цикл.
+
+    Контекст копируется: счетчики метрик запроса видны и в потоке.
+    """
+    return asyncio.get_running_loop().run_in_executor(
+        _executor.get(),
+        partial(contextvars.copy_context().run, func, *args, **kwargs)
+    )
+
+
+def async_variant(view):
+    """Регистрирует асинхронный вариант view для ASGIHandler.
+
+    Вариант вызывается для GET и HEAD без сессии, до middleware. Он
+    возвращает ответ или None, если запрос нужно отдать обычному view.
+    """
+    def decorator(coroutine):
+        view.async_variant = coroutine
+        return coroutine
+    return decorator
+
+
+def wsgi_environ(scope, body):
+    """WSGI-окружение из ASGI scope: WSGIRequest разбирает его сам."""
+    script_name = scope.get('root_path', '')
+    path = scope['path']
+    if script_name and path.startswith(script_name):
+        path = path[len(script_name):]
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        # Как и в WSGI, путь передается байтами, прочитанными в latin-1.
+        'SCRIPT_NAME': script_name.encode().decode('latin-1'),
+        'PATH_INFO': path.encode().decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'REMOTE_ADDR': client[0],
+        'SERVER_PROTOCOL': f'HTTP/{scope.get("http_version", "1.1")}',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', ()):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = f'HTTP_{name}'
+        value = value.decode('latin-1')
+        if name in environ:
+            value = f'{environ[name]},{value}'
+        environ[name] = value
+    return environ
+
+
+def response_headers(response):
+    headers = [
+        (name.lower().encode('latin-1'), value.encode('latin-1'))
+        for name, value in response.items()
+    ]
+    for cookie in response.cookies.values():
+        headers.append(
+            (b'set-cookie', cookie.output(header='').strip().encode())
+        )
+    return headers
+
+
+class ASGIHandler(base.BaseHandler):
+    """ASGI-приложение поверх обычной цепочки Django 2.2.
+
+    Цикл событий сам читает тело запроса и пишет ответ, поэтому медленные
+    клиенты не держат потоки. Middleware и view работают в пуле из
+    ASGI_THREADS потоков. Зарегистрированные через async_variant варианты
+    view отвечают анонимам прямо из цикла, уходя в пул только за кэшем.
+    """
+
+    def __init__(self, executor=None):
+        super().__init__()
+        self.load_middleware()
+        self.executor = executor or ThreadPoolExecutor(
+            settings.ASGI_THREADS, thread_name_prefix='asgi'
+        )
+        self.header_middleware = [
+            import_string(path)(None)
+            for path in HEADER_MIDDLEWARE
+            if path in settings.MIDDLEWARE
+        ]
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] != 'http':
+            raise ValueError(f'Неподдерживаемый тип {scope["type"]!r}')
+        _executor.set(self.executor)
+        body = await self.read_body(receive)
+        if body is None:
+            return
+        with body:
+            set_script_prefix(scope.get('root_path', '') or '/')
+            request = WSGIRequest(wsgi_environ(scope, body))
+            response = await self.async_response(request)
+            if response is None:
+                response = await run_sync(self.sync_response, request)
+            await self.send_response(response, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def read_body(self, receive):
+        """Тело запроса целиком; большое уходит во временный файл."""
+        body = tempfile.SpooledTemporaryFile(max_size=BODY_SPOOL_SIZE)
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                body.close()
+                return None
+            body.write(message.get('body', b''))
+            if not message.get('more_body'):
+                break
+        body.seek(0)
+        return body
+
+    async def async_response(self, request):
+        if (
+            request.method not in ('GET', 'HEAD')
+            or settings.SESSION_COOKIE_NAME in request.COOKIES
+        ):
+            return None
+        try:
+            match = get_resolver().resolve(request.path_info)
+        except Resolver404:
+            return None
+        variant = getattr(match.func, 'async_variant', None)
+        if variant is None:
+            return None
+        request.resolver_match = match
+        # Модели auth можно импортировать только после django.setup().
+        from django.contrib.auth.models import AnonymousUser
+        request.user = AnonymousUser()
+        # Цепочка middleware пропускается, поэтому метрики пишутся здесь.
+        with metrics.tracking() as stats:
+            response = await variant(request, *match.args, **match.kwargs)
+        if response is not None:
+            for middleware in self.header_middleware:
+                response = middleware.process_response(request, response)
+            metrics.observe(request, response, stats)
+        return response
+
+    def sync_response(self, request):
+        signals.request_started.send(sender=self.__class__, request=request)
+        response = self.get_response(request)
+        if not response.streaming:
+            # Закрытие шлет request_finished, и соединения с базой
+            # закрываются в том же потоке, где открывались.
+            response.close()
+        return response
+
+    async def send_response(self, response, send):
+        await send({
+            'type': 'http.response.start',
+            'status': response.status_code,
+            'headers': response_headers(response),
+        })
+        if not response.streaming:
+            await send(
+                {'type': 'http.response.body', 'body': response.content}
+            )
+            return
+        # Потоковый ответ читается в своем потоке: курсоры iterator() не
+        # должны переходить между соединениями разных потоков.
+        with ThreadPoolExecutor(1) as stream:
+            loop = asyncio.get_running_loop()
+            chunks = iter(response.streaming_content)
+            try:
+                while True:
+                    chunk = await loop.run_in_executor(
+                        stream, next, chunks, END
+                    )
+                    if chunk is END:
+                        break
+                    await send({
+                        'type': 'http.response.body',
+                        'body': chunk,
+                        'more_body': True,
+                    })
+            finally:
+                await loop.run_in_executor(stream, response.close)
+        await send({'type': 'http.response.body'})
+
+
+def get_asgi_application():
+    django.setup(set_prefix=False)
+    return ASGIHandler()
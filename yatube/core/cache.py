@@ -0,0 +1,334 @@
+import os
+import pickle
+import socket
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+from . import metrics
+
+SEQUENCE_KEY = 'two_tier:sequence'
+INVALIDATION_KEY = 'two_tier:invalidation:{}'
+# Сколько живет запись журнала и сколько записей процесс готов
+# дочитать; отставший сильнее сбрасывает L1 целиком.
+INVALIDATION_TIMEOUT = 300
+INVALIDATION_LIMIT = 1000
+ALL_KEYS = None
+STATS_KEY = 'two_tier:stats:{}:{}'
+WORKERS_KEY = 'two_tier:workers:{}'
+STATS_INTERVAL = 10
+STATS_TIMEOUT = 60
+MISSING = object()
+LOCMEM = 'django.core.cache.backends.locmem.LocMemCache'
+
+_tiers = {}
+_tiers_lock = threading.Lock()
+
+
+def _initial_sequence():
+    # Как и у поколений в posts.cache: после очистки L2 в обход clear()
+    # номер не должен совпасть с тем, что процессы уже видели.
+    return int(time.time() * 10 ** 6)
+
+
+def isolated_caches(prefix):
+    """CACHES, в которых общие уровни заменены LocMem: тесты и замеры
+    не должны ни очищать кэш сайта, ни оставлять в нем своих записей."""
+    return {
+        alias: config if config['BACKEND'] == 'core.cache.TwoTierCache'
+        else {'BACKEND': LOCMEM, 'LOCATION': f'{prefix}-{alias}'}
+        for alias, config in settings.CACHES.items()
+    }
+
+
+class LocalTier:
+    """LRU в памяти процесса, общий для всех потоков."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.sequence = None
+        self.checked = 0
+        self.published = 0
+        self.hits = {'l1': 0, 'l2': 0, 'miss': 0}
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return MISSING
+            expires, pickled = entry
+            if expires <= time.monotonic():
+                del self.entries[key]
+                return MISSING
+            self.entries.move_to_end(key)
+        return pickle.loads(pickled)
+
+    def set(self, key, value, timeout):
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self.lock:
+            self.entries[key] = (time.monotonic() + timeout, pickled)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def count(self, tier):
+        self.hits[tier] += 1
+        metrics.count_cache(tier != 'miss')
+
+    def snapshot(self):
+        total = sum(self.hits.values())
+        return {
+            **self.hits,
+            'entries': len(self.entries),
+            'l1_ratio': self.hits['l1'] / total if total else 0,
+            'l2_ratio': self.hits['l2'] / total if total else 0,
+        }
+
+
+class TwoTierCache(BaseCache):
+    """Маленький LRU в процессе перед общим кэшем (OPTIONS['L2']).
+
+    Записи живут в L1 не дольше L1_TIMEOUT секунд. delete, incr и clear
+    пишут в L2 журнал: очередной номер и ключи, которые он затронул.
+    Процессы сверяют номер не чаще раза в CHECK_INTERVAL секунд и
+    выбрасывают из L1 только эти ключи; если записи журнала нет, L1
+    сбрасывается целиком. Так счетчики версий из posts.cache видны всем
+    процессам с задержкой не больше CHECK_INTERVAL, а перезапись через
+    set - не больше L1_TIMEOUT.
+
+    Номер журнала растет через incr, поэтому L2 у нескольких процессов
+    должен увеличивать атомарно (Memcached, Redis). У FileBasedCache и
+    LocMem incr - это get и set, они годятся для одного процесса.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.name = location
+        self.l2_alias = options['L2']
+        self.l1_timeout = options.get('L1_TIMEOUT', 5)
+        self.check_interval = options.get('CHECK_INTERVAL', 1)
+        with _tiers_lock:
+            self.tier = _tiers.setdefault(
+                location, LocalTier(self._max_entries)
+            )
+
+    @property
+    def l2(self):
+        return caches[self.l2_alias]
+
+    def _local_key(self, key, version):
+        return self.l2.make_key(key, version=version)
+
+    def _local_timeout(self, timeout):
+        timeout = self.get_backend_timeout(timeout)
+        if timeout is None:
+            return self.l1_timeout
+        return min(self.l1_timeout, max(timeout - time.time(), 0))
+
+    def _sync(self):
+        now = time.monotonic()
+        tier = self.tier
+        if now - tier.checked < self.check_interval:
+            return
+        tier.checked = now
+        sequence = self.l2.get(SEQUENCE_KEY)
+        if sequence != tier.sequence:
+            self._catch_up(sequence)
+        if now - tier.published >= STATS_INTERVAL:
+            tier.published = now
+            self._publish_stats()
+
+    def _catch_up(self, sequence):
+        """Выбрасывает из L1 ключи, измененные другими процессами."""
+        tier = self.tier
+        if (
+            tier.sequence is None
+            or sequence is None
+            or not 0 < sequence - tier.sequence <= INVALIDATION_LIMIT
+        ):
+            tier.clear()
+        else:
+            keys = [
+                INVALIDATION_KEY.format(number)
+                for number in range(tier.sequence + 1, sequence + 1)
+            ]
+            log = self.l2.get_many(keys)
+            # Запись устарела или еще не дописана: что менялось, неизвестно.
+            if len(log) < len(keys) or ALL_KEYS in log.values():
+                tier.clear()
+            else:
+                for local_keys in log.values():
+                    for local_key in local_keys:
+                        tier.delete(local_key)
+        tier.sequence = sequence
+
+    def _broadcast(self, local_keys):
+        try:
+            sequence = self.l2.incr(SEQUENCE_KEY)
+        except ValueError:
+            self.l2.add(SEQUENCE_KEY, _initial_sequence(), None)
+            sequence = self.l2.incr(SEQUENCE_KEY)
+        self.l2.set(
+            INVALIDATION_KEY.format(sequence), local_keys, INVALIDATION_TIMEOUT
+        )
+        tier = self.tier
+        # Свои ключи L1 уже выбросил; чужие записи дочитает _sync.
+        if tier.sequence is not None and sequence == tier.sequence + 1:
+            tier.sequence = sequence
+
+    def _publish_stats(self):
+        worker = f'{socket.gethostname()}:{os.getpid()}'
+        self.l2.set(
+            STATS_KEY.format(self.name, worker),
+            self.tier.snapshot(),
+            STATS_TIMEOUT
+        )
+        workers_key = WORKERS_KEY.format(self.name)
+        now = time.time()
+        workers = {
+            name: seen
+            for name, seen in (self.l2.get(workers_key) or {}).items()
+            if now - seen < STATS_TIMEOUT
+        }
+        workers[worker] = now
+        self.l2.set(workers_key, workers, None)
+
+    def stats(self):
+        """Попадания по уровням в этом процессе."""
+        return self.tier.snapshot()
+
+    def collect_stats(self):
+        """Последние снимки статистики всех живых процессов."""
+        workers = self.l2.get(WORKERS_KEY.format(self.name)) or {}
+        snapshots = self.l2.get_many(
+            [STATS_KEY.format(self.name, worker) for worker in workers]
+        )
+        prefix = STATS_KEY.format(self.name, '')
+        return {
+            key[len(prefix):]: snapshot
+            for key, snapshot in snapshots.items()
+        }
+
+    def get(self, key, default=None, version=None):
+        self._sync()
+        local_key = self._local_key(key, version)
+        value = self.tier.get(local_key)
+        if value is not MISSING:
+            self.tier.count('l1')
+            return value
+        value = self.l2.get(key, MISSING, version=version)
+        if value is MISSING:
+            self.tier.count('miss')
+            return default
+        self.tier.count('l2')
+        self.tier.set(local_key, value, self.l1_timeout)
+        return value
+
+    def get_many(self, keys, version=None):
+        self._sync()
+        found = {}
+        rest = []
+        for key in keys:
+            value = self.tier.get(self._local_key(key, version))
+            if value is MISSING:
+                rest.append(key)
+            else:
+                self.tier.count('l1')
+                found[key] = value
+        if rest:
+            fetched = self.l2.get_many(rest, version=version)
+            for key in rest:
+                if key in fetched:
+                    self.tier.count('l2')
+                    self.tier.set(
+                        self._local_key(key, version),
+                        fetched[key],
+                        self.l1_timeout
+                    )
+                else:
+                    self.tier.count('miss')
+            found.update(fetched)
+        return found
+
+    def has_key(self, key, version=None):
+        return self.get(key, MISSING, version=version) is not MISSING
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        self.l2.set(key, value, timeout, version=version)
+        local_timeout = self._local_timeout(timeout)
+        local_key = self._local_key(key, version)
+        if local_timeout > 0:
+            self.tier.set(local_key, value, local_timeout)
+        else:
+            self.tier.delete(local_key)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        for key, value in data.items():
+            self.set(key, value, timeout, version=version)
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        added = self.l2.add(key, value, timeout, version=version)
+        local_key = self._local_key(key, version)
+        local_timeout = self._local_timeout(timeout)
+        if added and local_timeout > 0:
+            self.tier.set(local_key, value, local_timeout)
+        else:
+            self.tier.delete(local_key)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        return self.l2.touch(key, timeout, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        local_key = self._local_key(key, version)
+        try:
+            value = self.l2.incr(key, delta, version=version)
+        except ValueError:
+            self.tier.delete(local_key)
+            raise
+        self._broadcast([local_key])
+        self.tier.set(local_key, value, self.l1_timeout)
+        return value
+
+    def delete(self, key, version=None):
+        local_key = self._local_key(key, version)
+        self.l2.delete(key, version=version)
+        self.tier.delete(local_key)
+        self._broadcast([local_key])
+
+    def delete_many(self, keys, version=None):
+        local_keys = [self._local_key(key, version) for key in keys]
+        self.l2.delete_many(keys, version=version)
+        for local_key in local_keys:
+            self.tier.delete(local_key)
+        self._broadcast(local_keys)
+
+    def clear(self):
+        sequence = self.l2.get(SEQUENCE_KEY)
+        self.l2.clear()
+        self.tier.clear()
+        if sequence is not None:
+            self.l2.add(SEQUENCE_KEY, sequence, None)
+        self._broadcast(ALL_KEYS)
@@ -0,0 +1,43 @@
+from django.db.backends.signals import connection_created
+
+# Имена прагм подставляются в SQL как есть, значения проверяются здесь.
+PRAGMA_VALUES = {
+    'journal_mode': ('delete', 'truncate', 'persist', 'memory', 'wal', 'off'),
+    'synchronous': ('off', 'normal', 'full', 'extra'),
+    'mmap_size': int,
+    'cache_size': int,
+    'busy_timeout': int,
+    'temp_store': ('default', 'file', 'memory'),
+}
+
+
+def pragma_statements(pragmas):
+    statements = []
+    for name, value in pragmas.items():
+        allowed = PRAGMA_VALUES.get(name)
+        if allowed is None:
+            raise ValueError(f'Неизвестная прагма {name!r}')
+        if allowed is int:
+            value = int(value)
+        elif str(value).lower() not in allowed:
+            raise ValueError(f'Недопустимое значение {name}={value!r}')
+        statements.append(f'PRAGMA {name} = {value}')
+    return statements
+
+
+def apply_pragmas(sender, connection, **kwargs):
+    """Настраивает каждое новое соединение с SQLite по DATABASES[...]
+    ['PRAGMAS']: WAL, чтобы запись комментариев не блокировала чтение,
+    и кэш страниц, чтобы долгоживущее соединение не читало файл заново.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = connection.settings_dict.get('PRAGMAS')
+    if not pragmas:
+        return
+    for statement in pragma_statements(pragmas):
+        connection.connection.execute(statement)
+
+
+def install():
+    connection_created.connect(apply_pragmas, dispatch_uid='core.db.pragmas')
@@ -0,0 +1,141 @@
+import asyncio
+import io
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import cycle, islice
+from urllib.parse import urlsplit
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+
+from core.asgi import ASGIHandler, wsgi_environ
+
+
+def scope_for(url):
+    parts = urlsplit(url)
+    return {
+        'type': 'http',
+        'method': 'GET',
+        'path': parts.path or '/',
+        'query_string': parts.query.encode(),
+        'headers': [(b'host', b'testserver')],
+        'server': ('testserver', 80),
+        # Не из INTERNAL_IPS: панель отладки не должна мерить себя.
+        'client': ('192.0.2.1', 0),
+    }
+
+
+def percentile(latencies, share):
+    return statistics.quantiles(latencies, n=100)[share - 1] * 1000
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность WSGI и ASGI на одних и тех же '
+        'адресах при медленных клиентах'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'urls', nargs='*', default=['/'], help='Адреса для GET'
+        )
+        parser.add_argument(
+            '--requests', type=int, default=500, help='Всего запросов'
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=200,
+            help='Одновременных клиентов'
+        )
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=20,
+            help='Потоков у WSGI-сервера и в пуле ASGI'
+        )
+        parser.add_argument(
+            '--client-delay',
+            type=float,
+            default=50,
+            help='Сколько миллисекунд клиент принимает ответ'
+        )
+
+    def handle(self, *args, **options):
+        urls = list(islice(cycle(options['urls']), options['requests']))
+        delay = options['client_delay'] / 1000
+        for name, serve in (
+            ('WSGI', self.serve_wsgi), ('ASGI', self.serve_asgi)
+        ):
+            with ThreadPoolExecutor(options['threads']) as pool:
+                started = time.perf_counter()
+                results = asyncio.run(
+                    self.clients(serve(pool, delay), urls, options)
+                )
+                elapsed = time.perf_counter() - started
+            latencies = [latency for latency, _ in results]
+            errors = sum(status >= 400 for _, status in results)
+            self.stdout.write(
+                f'{name}: {len(urls) / elapsed:8.1f} запросов/с, '
+                f'p50 {percentile(latencies, 50):7.1f} мс, '
+                f'p95 {percentile(latencies, 95):7.1f} мс, '
+                f'ошибок {errors}'
+            )
+
+    async def clients(self, serve, urls, options):
+        """--concurrency клиентов; задержка считается с отправки запроса,
+        включая ожидание свободного потока."""
+        limit = asyncio.Semaphore(options['concurrency'])
+
+        async def client(url):
+            async with limit:
+                started = time.perf_counter()
+                status = await serve(url)
+                return time.perf_counter() - started, status
+
+        return await asyncio.gather(*(client(url) for url in urls))
+
+    def serve_wsgi(self, pool, delay):
+        """Синхронный сервер: поток занят, пока клиент читает ответ."""
+        application = WSGIHandler()
+
+        def request(url):
+            status = []
+            result = application(
+                wsgi_environ(scope_for(url), io.BytesIO()),
+                lambda line, headers: status.append(int(line.split()[0]))
+            )
+            try:
+                for _ in result:
+                    pass
+                time.sleep(delay)
+            finally:
+                result.close()
+            return status[0]
+
+        async def serve(url):
+            return await asyncio.get_running_loop().run_in_executor(
+                pool, request, url
+            )
+        return serve
+
+    def serve_asgi(self, pool, delay):
+        """Цикл событий отдает ответ клиенту, не занимая поток пула."""
+        application = ASGIHandler(pool)
+
+        async def serve(url):
+            status = []
+
+            async def receive():
+                return {'type': 'http.request', 'body': b''}
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    status.append(message['status'])
+                elif not message.get('more_body'):
+                    await asyncio.sleep(delay)
+
+            await application(scope_for(url), receive, send)
+            return status[0]
+        return serve
@@ -0,0 +1,162 @@
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections
+
+from posts.models import Comment, Post, User
+
+SEED_POSTS = 1000
+SEED_AUTHORS = 10
+
+
+class Command(BaseCommand):
+    help = (
+        'Смешанная нагрузка чтения и записи комментариев на копии базы: '
+        'настройки SQLite по умолчанию против DATABASES["default"]'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--seconds', type=float, default=5, help='Длительность прогона'
+        )
+        parser.add_argument(
+            '--readers', type=int, default=8, help='Потоков чтения'
+        )
+        parser.add_argument(
+            '--writers', type=int, default=2, help='Потоков записи'
+        )
+
+    def handle(self, *args, **options):
+        source = settings.DATABASES['default']
+        if source['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError('Нужна база SQLite')
+        configs = (
+            # Так база работала раньше: журнал отката и новое соединение
+            # на каждый запрос.
+            ('По умолчанию', {'journal_mode': 'delete'}, 0),
+            ('Настроенная', source.get('PRAGMAS', {}), source['CONN_MAX_AGE']),
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            for name, pragmas, max_age in configs:
+                alias = f'benchmark_{len(connections.databases)}'
+                path = os.path.join(directory, f'{alias}.sqlite3')
+                self.copy(source['NAME'], path)
+                connections.databases[alias] = {
+                    **source,
+                    'NAME': path,
+                    'PRAGMAS': pragmas,
+                    'CONN_MAX_AGE': max_age,
+                }
+                self.seed(alias)
+                result = self.run(alias, options)
+                connections[alias].close()
+                self.report(name, result, options['seconds'])
+
+    def copy(self, source, target):
+        origin = sqlite3.connect(source)
+        copy = sqlite3.connect(target)
+        try:
+            origin.backup(copy)
+        finally:
+            origin.close()
+            copy.close()
+
+    def seed(self, alias):
+        if Post.objects.using(alias).exists():
+            return
+        authors = User.objects.using(alias).bulk_create(
+            User(username=f'benchmark-{number}')
+            for number in range(SEED_AUTHORS)
+        )
+        authors = list(User.objects.using(alias).filter(
+            username__in=[author.username for author in authors]
+        ))
+        Post.objects.using(alias).bulk_create(
+            Post(author=random.choice(authors), text=f'Пост {number}')
+            for number in range(SEED_POSTS)
+        )
+
+    def run(self, alias, options):
+        post_ids = list(Post.objects.using(alias).values_list('id', flat=True))
+        author_ids = list(
+            User.objects.using(alias).values_list('id', flat=True)
+        )
+        persistent = connections.databases[alias]['CONN_MAX_AGE'] != 0
+        deadline = time.monotonic() + options['seconds']
+        results = {'read': [], 'write': [], 'locked': 0}
+        lock = threading.Lock()
+
+        def read():
+            post_id = random.choice(post_ids)
+            list(
+                Post.objects.using(alias).select_related(
+                    'author', 'group'
+                ).order_by('-pub_date')[:10]
+            )
+            list(
+                Comment.objects.using(alias).filter(
+                    post_id=post_id
+                ).select_related('author')[:20]
+            )
+
+        def write():
+            Comment.objects.using(alias).bulk_create([Comment(
+                post_id=random.choice(post_ids),
+                author_id=random.choice(author_ids),
+                text='Комментарий под нагрузкой',
+            )])
+
+        def worker(kind, operation):
+            latencies = []
+            locked = 0
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                try:
+                    operation()
+                except OperationalError:
+                    locked += 1
+                else:
+                    latencies.append(time.perf_counter() - started)
+                # Конец запроса: то же, что делает request_finished.
+                if persistent:
+                    connections[alias].close_if_unusable_or_obsolete()
+                else:
+                    connections[alias].close()
+            connections[alias].close()
+            with lock:
+                results[kind].extend(latencies)
+                results['locked'] += locked
+
+        threads = [
+            threading.Thread(target=worker, args=('read', read))
+            for _ in range(options['readers'])
+        ] + [
+            threading.Thread(target=worker, args=('write', write))
+            for _ in range(options['writers'])
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def report(self, name, result, seconds):
+        self.stdout.write(self.style.MIGRATE_HEADING(name))
+        for kind in ('read', 'write'):
+            latencies = result[kind]
+            p95 = (
+                statistics.quantiles(latencies, n=20)[-1] * 1000
+                if len(latencies) > 1 else 0
+            )
+            self.stdout.write(
+                f'  {kind}: {len(latencies) / seconds:8.1f} оп/с, '
+                f'p95 {p95:7.1f} мс'
+            )
+        self.stdout.write(f'  database is locked: {result["locked"]}')
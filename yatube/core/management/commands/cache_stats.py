@@ -0,0 +1,40 @@
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Показывает долю попаданий по уровням двухуровневого кэша'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--alias',
+            default='default',
+            help='Имя кэша из CACHES'
+        )
+
+    def handle(self, *args, **options):
+        cache = caches[options['alias']]
+        if not hasattr(cache, 'collect_stats'):
+            raise CommandError(
+                f'Кэш {options["alias"]} не двухуровневый'
+            )
+        workers = cache.collect_stats()
+        totals = {'l1': 0, 'l2': 0, 'miss': 0}
+        for worker, snapshot in sorted(workers.items()):
+            for tier in totals:
+                totals[tier] += snapshot[tier]
+            self.stdout.write(
+                f'{worker}: L1 {snapshot["l1_ratio"]:.1%}, '
+                f'L2 {snapshot["l2_ratio"]:.1%}, '
+                f'записей в L1 {snapshot["entries"]}'
+            )
+        total = sum(totals.values())
+        if not total:
+            self.stdout.write('Статистики пока нет')
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f'Всего запросов {total}: '
+            f'L1 {totals["l1"] / total:.1%}, '
+            f'L2 {totals["l2"] / total:.1%}, '
+            f'промахи {totals["miss"] / total:.1%}'
+        ))
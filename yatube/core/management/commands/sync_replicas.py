@@ -0,0 +1,52 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+def copy_database(source, target, timeout):
+    """Копирует базу через backup API: читатели реплики видят либо
+    старую, либо новую копию целиком."""
+    origin = sqlite3.connect(source, timeout=timeout)
+    replica = sqlite3.connect(target, timeout=timeout)
+    try:
+        origin.backup(replica)
+    finally:
+        origin.close()
+        replica.close()
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную базу SQLite в файлы реплик из DATABASE_REPLICAS; '
+        'с --interval повторяет копирование'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            type=float,
+            help='Повторять каждые столько секунд'
+        )
+
+    def handle(self, *args, **options):
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError('Реплики не заданы: укажите DB_REPLICAS')
+        primary = settings.DATABASES['default']
+        timeout = primary.get('PRAGMAS', {}).get('busy_timeout', 5000) / 1000
+        while True:
+            started = time.monotonic()
+            for alias in settings.DATABASE_REPLICAS:
+                copy_database(
+                    primary['NAME'],
+                    settings.DATABASES[alias]['NAME'],
+                    timeout
+                )
+            self.stdout.write(
+                f'Реплики обновлены за '
+                f'{(time.monotonic() - started) * 1000:.0f} мс'
+            )
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,303 @@
+import json
+import os
+import socket
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from glob import glob
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+UNRESOLVED = 'unresolved'
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class RequestStats:
+    """Счетчики одного запроса: их пополняют обертка запросов к базе
+    и кэш, пока запрос обрабатывается."""
+    __slots__ = (
+        'started', 'queries', 'query_seconds', 'cache_hits', 'cache_misses'
+    )
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+
+_current = ContextVar('request_stats', default=None)
+
+
+def new_view_stats():
+    return {
+        'requests': {},
+        'latency': [0] * (len(LATENCY_BUCKETS) + 1),
+        'latency_sum': 0.0,
+        'queries': 0,
+        'query_seconds': 0.0,
+        'cache_hits': 0,
+        'cache_misses': 0,
+        'size': [0] * (len(SIZE_BUCKETS) + 1),
+        'size_sum': 0,
+    }
+
+
+class Registry:
+    """Метрики процесса по именам маршрутов.
+
+    Раз в METRICS_FLUSH_INTERVAL секунд снимок пишется в свой файл
+    в METRICS_DIR, а страница метрик складывает файлы всех воркеров.
+    В имени файла есть время запуска воркера, поэтому новый процесс с
+    тем же pid не затирает чужой снимок. Файлы, которые не обновлялись
+    METRICS_FILE_TTL секунд, считаются оставшимися от умерших воркеров
+    и удаляются; живой воркер обновляет свой и без запросов.
+    """
+
+    def __init__(self):
+        self.views = defaultdict(new_view_stats)
+        self.lock = threading.Lock()
+        self.flushed = 0
+        self.pid = None
+        self.name = None
+
+    def start(self):
+        """Заводит имя файла и поток обновления в каждом процессе."""
+        with self.lock:
+            if self.pid == os.getpid():
+                return
+            # После fork счетчики родителя остаются в его файле.
+            self.views.clear()
+            self.pid = os.getpid()
+            self.name = f'{socket.gethostname()}-{self.pid}-{time.time_ns()}'
+        threading.Thread(
+            target=self.heartbeat, name='metrics', daemon=True
+        ).start()
+
+    def heartbeat(self):
+        while True:
+            time.sleep(settings.METRICS_FLUSH_INTERVAL)
+            try:
+                if os.path.isdir(settings.METRICS_DIR):
+                    self.flush()
+            except OSError:
+                # Каталог убрали между проверкой и записью.
+                pass
+
+    def record(self, view, status, seconds, size, stats):
+        if self.pid != os.getpid():
+            self.start()
+        with self.lock:
+            entry = self.views[view]
+            status = str(status)
+            entry['requests'][status] = entry['requests'].get(status, 0) + 1
+            entry['latency'][bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            entry['latency_sum'] += seconds
+            entry['queries'] += stats.queries
+            entry['query_seconds'] += stats.query_seconds
+            entry['cache_hits'] += stats.cache_hits
+            entry['cache_misses'] += stats.cache_misses
+            if size is not None:
+                entry['size'][bisect_left(SIZE_BUCKETS, size)] += 1
+                entry['size_sum'] += size
+        if time.monotonic() - self.flushed >= settings.METRICS_FLUSH_INTERVAL:
+            self.flush()
+
+    def snapshot(self):
+        with self.lock:
+            return json.loads(json.dumps(self.views))
+
+    def path(self):
+        if self.pid != os.getpid():
+            self.start()
+        return os.path.join(settings.METRICS_DIR, f'{self.name}.json')
+
+    def flush(self):
+        self.flushed = time.monotonic()
+        os.makedirs(settings.METRICS_DIR, exist_ok=True)
+        path = self.path()
+        temporary = f'{path}.{threading.get_ident()}.tmp'
+        with open(temporary, 'w') as file:
+            json.dump(self.snapshot(), file)
+        os.replace(temporary, path)
+
+    def reset(self):
+        with self.lock:
+            self.views.clear()
+
+
+registry = Registry()
+
+
+def merge(total, views):
+    for view, entry in views.items():
+        target = total[view]
+        for status, count in entry['requests'].items():
+            target['requests'][status] = (
+                target['requests'].get(status, 0) + count
+            )
+        for name in ('latency', 'size'):
+            target[name] = [a + b for a, b in zip(target[name], entry[name])]
+        for name in ('latency_sum', 'queries', 'query_seconds',
+                     'cache_hits', 'cache_misses', 'size_sum'):
+            target[name] += entry[name]
+
+
+def collect():
+    """Сумма снимков всех воркеров; свой снимок сначала обновляется."""
+    registry.flush()
+    total = defaultdict(new_view_stats)
+    expired = time.time() - settings.METRICS_FILE_TTL
+    for path in glob(os.path.join(settings.METRICS_DIR, '*.json')):
+        try:
+            if os.path.getmtime(path) < expired:
+                os.remove(path)
+                continue
+            with open(path) as file:
+                merge(total, json.load(file))
+        except (OSError, ValueError, KeyError):
+            # Файл пишет другой воркер или он от старой версии.
+            continue
+    return total
+
+
+def escape(value):
+    return (
+        value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    )
+
+
+def histogram(lines, name, labels, counts, buckets, total):
+    cumulative = 0
+    for bound, count in zip((*buckets, '+Inf'), counts):
+        cumulative += count
+        lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+    lines.append(f'{name}_sum{{{labels}}} {total}')
+    lines.append(f'{name}_count{{{labels}}} {cumulative}')
+
+
+def render(views):
+    """Метрики в текстовом формате Prometheus."""
+    families = {
+        'requests': ['# HELP yatube_requests_total Обработанные запросы.',
+                     '# TYPE yatube_requests_total counter'],
+        'latency': [
+            '# HELP yatube_request_duration_seconds Время ответа.',
+            '# TYPE yatube_request_duration_seconds histogram'],
+        'queries': ['# HELP yatube_db_queries_total Запросы к базе.',
+                    '# TYPE yatube_db_queries_total counter'],
+        'query_seconds': [
+            '# HELP yatube_db_query_duration_seconds_total Время в базе.',
+            '# TYPE yatube_db_query_duration_seconds_total counter'],
+        'cache': ['# HELP yatube_cache_requests_total Чтения из кэша.',
+                  '# TYPE yatube_cache_requests_total counter'],
+        'size': ['# HELP yatube_response_size_bytes Размер ответа.',
+                 '# TYPE yatube_response_size_bytes histogram'],
+    }
+    for view in sorted(views):
+        entry = views[view]
+        labels = f'view="{escape(view)}"'
+        for status, count in sorted(entry['requests'].items()):
+            families['requests'].append(
+                f'yatube_requests_total{{{labels},status="{status}"}} {count}'
+            )
+        histogram(
+            families['latency'], 'yatube_request_duration_seconds', labels,
+            entry['latency'], LATENCY_BUCKETS, entry['latency_sum']
+        )
+        families['queries'].append(
+            f'yatube_db_queries_total{{{labels}}} {entry["queries"]}'
+        )
+        families['query_seconds'].append(
+            f'yatube_db_query_duration_seconds_total{{{labels}}} '
+            f'{entry["query_seconds"]}'
+        )
+        for result, key in (('hit', 'cache_hits'), ('miss', 'cache_misses')):
+            families['cache'].append(
+                f'yatube_cache_requests_total{{{labels},result="{result}"}} '
+                f'{entry[key]}'
+            )
+        histogram(
+            families['size'], 'yatube_response_size_bytes', labels,
+            entry['size'], SIZE_BUCKETS, entry['size_sum']
+        )
+    return '\n'.join(
+        line for family in families.values() for line in family
+    ) + '\n'
+
+
+def count_cache(hit):
+    stats = _current.get()
+    if stats is None:
+        return
+    if hit:
+        stats.cache_hits += 1
+    else:
+        stats.cache_misses += 1
+
+
+def count_query(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.query_seconds += time.perf_counter() - started
+
+
+def wrap_connection(sender, connection, **kwargs):
+    # Соединение переоткрывается в том же объекте: обертка одна.
+    if count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_query)
+
+
+def install():
+    connection_created.connect(
+        wrap_connection, dispatch_uid='core.metrics.queries'
+    )
+
+
+@contextmanager
+def tracking():
+    """Счетчики запроса, пока выполняется блок."""
+    stats = RequestStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def observe(request, response, stats):
+    match = request.resolver_match
+    registry.record(
+        match.view_name if match else UNRESOLVED,
+        response.status_code,
+        time.perf_counter() - stats.started,
+        None if response.streaming else len(response.content),
+        stats,
+    )
+
+
+class MetricsMiddleware:
+    """Время, запросы к базе, попадания в кэш и размер ответа по имени
+    маршрута. Стоит первой, чтобы мерить всю цепочку."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with tracking() as stats:
+            response = self.get_response(request)
+        observe(request, response, stats)
+        return response
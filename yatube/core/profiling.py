@@ -0,0 +1,162 @@
+import cProfile
+import io
+import os
+import pstats
+import random
+import re
+import time
+from contextlib import ExitStack
+from datetime import datetime, timezone
+from glob import glob
+
+from django.conf import settings
+from django.db import connections
+
+PROFILE_FLAG = 'profile'
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+PROFILE_ON = ('1', 'true')
+PROFILE_NAME = re.compile(r'^[\w-]+\.(prof|txt)$')
+TOP_FUNCTIONS = 40
+
+
+class QueryTimer:
+    """Обертка запросов к базе: SQL и время каждого."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((time.perf_counter() - started, sql))
+
+
+def switched_on(value):
+    return (value or '').lower() in PROFILE_ON
+
+
+def wanted(request):
+    """Причина профилировать запрос или None.
+
+    Персонал включает профиль флагом ?profile=1 (или true) или
+    заголовком X-Profile с тем же значением, остальные запросы
+    попадают в выборку 1 из PROFILING_SAMPLE_RATE.
+    """
+    if request.user.is_staff and (
+        switched_on(request.GET.get(PROFILE_FLAG))
+        or switched_on(request.META.get(PROFILE_HEADER))
+    ):
+        return 'staff'
+    rate = settings.PROFILING_SAMPLE_RATE
+    if rate and random.randrange(rate) == 0:
+        return 'sample'
+    return None
+
+
+def report(request, response, reason, seconds, profiler, timer):
+    sql_seconds = sum(duration for duration, _ in timer.queries)
+    out = io.StringIO()
+    out.write(
+        f'{request.method} {request.get_full_path()} -> '
+        f'{response.status_code} за {seconds * 1000:.1f} мс\n'
+        f'Причина: {reason}, пользователь: {request.user}\n'
+        f'SQL: {len(timer.queries)} запросов, {sql_seconds * 1000:.1f} мс\n'
+    )
+    for duration, sql in sorted(timer.queries, reverse=True):
+        out.write(f'{duration * 1000:8.2f} мс  {sql}\n')
+    out.write('\n')
+    stats = pstats.Stats(profiler, stream=out)
+    stats.sort_stats('cumulative').print_stats(TOP_FUNCTIONS)
+    return out.getvalue()
+
+
+def save(request, response, reason, seconds, profiler, timer):
+    """Пишет .prof для pstats/snakeviz и текстовый отчет рядом."""
+    match = request.resolver_match
+    view = re.sub(r'\W', '_', match.view_name if match else 'unresolved')
+    name = f'{time.time_ns()}-{os.getpid()}-{view}'
+    os.makedirs(settings.PROFILING_DIR, exist_ok=True)
+    path = os.path.join(settings.PROFILING_DIR, name)
+    profiler.dump_stats(f'{path}.prof')
+    with open(f'{path}.txt', 'w') as file:
+        file.write(
+            report(request, response, reason, seconds, profiler, timer)
+        )
+    trim()
+    return name
+
+
+def trim():
+    """Оставляет PROFILING_KEEP последних профилей."""
+    paths = sorted(glob(os.path.join(settings.PROFILING_DIR, '*.prof')))
+    for path in paths[:-settings.PROFILING_KEEP or None]:
+        for stale in (path, path[:-len('prof')] + 'txt'):
+            try:
+                os.remove(stale)
+            except FileNotFoundError:
+                # Уже удалил соседний воркер.
+                pass
+
+
+def profiles():
+    """Сохраненные профили, новые первыми."""
+    found = []
+    paths = glob(os.path.join(settings.PROFILING_DIR, '*.prof'))
+    for path in sorted(paths, reverse=True):
+        name = os.path.basename(path)[:-len('.prof')]
+        try:
+            size = os.path.getsize(path)
+        except FileNotFoundError:
+            continue
+        found.append({
+            'name': name,
+            'created': datetime.fromtimestamp(
+                int(name.split('-', 1)[0]) / 1e9, timezone.utc
+            ),
+            'view': name.split('-', 2)[-1],
+            'size': size,
+        })
+    return found
+
+
+def profile_path(name):
+    """Путь к файлу профиля или None, если имя чужое."""
+    if not PROFILE_NAME.match(name):
+        return None
+    path = os.path.join(settings.PROFILING_DIR, name)
+    return path if os.path.isfile(path) else None
+
+
+class ProfilingMiddleware:
+    """Профилирует view под cProfile и замеряет его SQL.
+
+    Стоит последней: в профиль попадает сам view, а пользователь
+    уже известен. Имя профиля возвращается персоналу в заголовке
+    X-Profile-Id; остальным оно не показывается.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        reason = wanted(request)
+        if reason is None:
+            return self.get_response(request)
+        timer = QueryTimer()
+        profiler = cProfile.Profile()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timer))
+            started = time.perf_counter()
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+            seconds = time.perf_counter() - started
+        name = save(request, response, reason, seconds, profiler, timer)
+        if request.user.is_staff:
+            response['X-Profile-Id'] = name
+        return response
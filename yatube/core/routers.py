@@ -0,0 +1,88 @@
+import random
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICATED_MODELS = {
+    'posts.post', 'posts.group', 'posts.comment', 'posts.follow'
+}
+PIN_COOKIE = 'primary_until'
+
+# До какого времени (time.time()) чтения идут в основную базу.
+_pinned_until = ContextVar('pinned_until', default=0)
+
+
+def pin_to_primary():
+    _pinned_until.set(time.time() + settings.REPLICA_PIN_SECONDS)
+
+
+def is_pinned():
+    return _pinned_until.get() > time.time()
+
+
+class ReplicaRouter:
+    """Чтение постов, групп, комментариев и подписок - со случайной
+    реплики из DATABASE_REPLICAS, запись - в основную базу.
+
+    После записи чтения этого потока (а через cookie - и следующие
+    запросы пользователя) REPLICA_PIN_SECONDS секунд идут в основную
+    базу: реплика может еще не знать о только что сделанном.
+    """
+
+    def db_for_read(self, model, **hints):
+        if (
+            not settings.DATABASE_REPLICAS
+            or model._meta.label_lower not in REPLICATED_MODELS
+            or is_pinned()
+            # Внутри транзакции читаем то, что в ней же записали.
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        if model._meta.label_lower in REPLICATED_MODELS:
+            pin_to_primary()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Реплики - копии основной базы, их схему приносит sync_replicas.
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+class ReplicaPinMiddleware:
+    """Переносит закрепление за основной базой между запросами в cookie."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            pinned_until = float(request.COOKIES.get(PIN_COOKIE, 0))
+        except ValueError:
+            pinned_until = 0
+        token = _pinned_until.set(pinned_until)
+        try:
+            response = self.get_response(request)
+            written = _pinned_until.get()
+        finally:
+            _pinned_until.reset(token)
+        if written > pinned_until:
+            response.set_cookie(
+                PIN_COOKIE,
+                str(written),
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
@@ -0,0 +1,25 @@
+import shutil
+import tempfile
+
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+from .cache import isolated_caches
+
+
+class TestRunner(DiscoverRunner):
+    """Тесты не делят с запущенным сайтом ни общий кэш (их cache.clear()
+    сбрасывал бы и его кэш), ни каталог снимков метрик."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.directory = tempfile.mkdtemp()
+        self.isolated = override_settings(
+            CACHES=isolated_caches('tests'), METRICS_DIR=self.directory
+        )
+        self.isolated.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.isolated.disable()
+        shutil.rmtree(self.directory, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
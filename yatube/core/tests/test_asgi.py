@@ -0,0 +1,96 @@
+import asyncio
+import os
+import subprocess
+import sys
+from concurrent.futures import Executor, Future
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+
+from ..asgi import ASGIHandler
+
+User = get_user_model()
+
+
+class InlineExecutor(Executor):
+    """Выполняет задачи сразу: тестовая транзакция видна только своему
+    соединению, а у потоков пула соединения свои."""
+
+    def submit(self, func, *args, **kwargs):
+        future = Future()
+        future.set_result(func(*args, **kwargs))
+        return future
+
+
+def call(handler, path, method='GET', headers=(), body=b''):
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': body}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        'type': 'http',
+        'method': method,
+        'path': path,
+        'query_string': b'',
+        'headers': [(b'host', b'testserver'), *headers],
+    }
+    asyncio.run(handler(scope, receive, send))
+    start, *bodies = messages
+    return start['status'], dict(start['headers']), b''.join(
+        message.get('body', b'') for message in bodies
+    )
+
+
+class ASGIHandlerTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.handler = ASGIHandler(InlineExecutor())
+
+    def test_anonymous_page_from_cache_without_queries(self):
+        status, _, body = call(self.handler, '/')
+        self.assertEqual(status, 200)
+        with self.assertNumQueries(0):
+            status, headers, cached = call(self.handler, '/')
+        self.assertEqual(status, 200)
+        self.assertEqual(cached, body)
+        self.assertIn(b'x-frame-options', headers)
+
+    def test_follow_index_redirects_anonymous(self):
+        with self.assertNumQueries(0):
+            status, headers, _ = call(self.handler, '/follow/')
+        self.assertEqual(status, 302)
+        self.assertTrue(headers[b'location'].startswith(b'/auth/login/'))
+
+    def test_session_and_post_go_through_middleware(self):
+        user = User.objects.create_user(username='asgi', password='secret')
+        self.client.force_login(user)
+        session = self.client.cookies[settings.SESSION_COOKIE_NAME].value
+        cookie = f'{settings.SESSION_COOKIE_NAME}={session}'.encode()
+        status, _, _ = call(
+            self.handler, '/follow/', headers=[(b'cookie', cookie)]
+        )
+        self.assertEqual(status, 200)
+        # Без токена POST останавливает CsrfViewMiddleware.
+        _, _, body = call(self.handler, '/auth/login/', method='POST')
+        self.assertIn('CSRF', body.decode())
+
+
+class EntryPointTests(SimpleTestCase):
+    def test_entry_point_imports_in_fresh_process(self):
+        # Как у ASGI-сервера: настройки берутся из самого модуля.
+        env = dict(os.environ)
+        env.pop('DJANGO_SETTINGS_MODULE', None)
+        result = subprocess.run(
+            [sys.executable, '-c', 'import yatube.asgi as m; m.application'],
+            cwd=settings.BASE_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
@@ -0,0 +1,82 @@
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+
+from ..cache import INVALIDATION_KEY, SEQUENCE_KEY
+
+TWO_TIER = {
+    'BACKEND': 'core.cache.TwoTierCache',
+    'OPTIONS': {'L2': 'shared', 'MAX_ENTRIES': 2, 'CHECK_INTERVAL': 0},
+}
+
+
+@override_settings(CACHES={
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'two-tier-tests',
+    },
+    # Два кэша с разными L1 изображают два процесса с общим L2.
+    'first': {**TWO_TIER, 'LOCATION': 'first'},
+    'second': {**TWO_TIER, 'LOCATION': 'second'},
+})
+class TwoTierCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.first = caches['first']
+        self.second = caches['second']
+        self.first.clear()
+
+    def test_hits_counted_per_tier(self):
+        """Повторное чтение обслуживает L1, первое - L2."""
+        self.first.set('key', 'value')
+        before = self.second.stats()
+        self.assertEqual(self.second.get('key'), 'value')
+        self.assertEqual(self.second.get('key'), 'value')
+        self.assertIsNone(self.second.get('missing'))
+        after = self.second.stats()
+        self.assertEqual(
+            [after[tier] - before[tier] for tier in ('l1', 'l2', 'miss')],
+            [1, 1, 1]
+        )
+
+    def test_l1_is_bounded_lru(self):
+        """Из L1 вытесняется давно не читанный ключ."""
+        for key in ('a', 'b'):
+            self.first.set(key, key)
+        self.first.get('a')
+        self.first.set('c', 'c')
+        self.assertEqual(list(self.first.tier.entries), [
+            self.first._local_key('a', None),
+            self.first._local_key('c', None),
+        ])
+
+    def test_invalidation_reaches_other_process(self):
+        """delete и incr в одном процессе сбрасывают L1 другого."""
+        self.first.set('key', 'old')
+        self.first.set('counter', 1)
+        self.assertEqual(self.second.get('key'), 'old')
+        self.assertEqual(self.second.get('counter'), 1)
+        self.first.delete('key')
+        self.assertIsNone(self.second.get('key'))
+        self.first.incr('counter')
+        self.assertEqual(self.second.get('counter'), 2)
+
+    def test_invalidation_is_per_key(self):
+        """Чужой delete выбрасывает из L1 только свой ключ, а потерянная
+        запись журнала или clear сбрасывают L1 целиком."""
+        self.first.set('key', 'old')
+        self.first.set('other', 'value')
+        self.second.get('key')
+        self.second.get('other')
+        self.first.delete('key')
+        self.assertIsNone(self.second.get('key'))
+        other = self.second._local_key('other', None)
+        self.assertIn(other, self.second.tier.entries)
+        sequence = self.first.l2.incr(SEQUENCE_KEY)
+        self.first.l2.delete(INVALIDATION_KEY.format(sequence))
+        self.second.get('missing')
+        self.assertNotIn(other, self.second.tier.entries)
+        self.second.get('other')
+        self.first.clear()
+        self.assertIsNone(self.second.get('other'))
@@ -0,0 +1,32 @@
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+
+from ..db import pragma_statements
+
+
+class PragmaTests(SimpleTestCase):
+    def test_values_are_checked(self):
+        self.assertEqual(
+            pragma_statements({'synchronous': 'NORMAL', 'cache_size': '-64'}),
+            ['PRAGMA synchronous = NORMAL', 'PRAGMA cache_size = -64']
+        )
+        for pragmas in (
+            {'journal_mode': 'wal; DROP TABLE posts_post'},
+            {'cache_size': 'big'},
+            {'locking_mode': 'exclusive'},
+        ):
+            with self.subTest(pragmas=pragmas):
+                with self.assertRaises(ValueError):
+                    pragma_statements(pragmas)
+
+
+class ConnectionTests(TestCase):
+    def test_pragmas_applied_to_connection(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(
+                cursor.fetchone()[0],
+                connection.settings_dict['PRAGMAS']['busy_timeout']
+            )
@@ -0,0 +1,98 @@
+import json
+import os
+import tempfile
+import time
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post, User
+
+from ..metrics import registry
+
+
+class MetricsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='danil')
+        Post.objects.create(author=cls.author, text='Тестовый пост')
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        settings = override_settings(
+            METRICS_DIR=self.directory, METRICS_ALLOWED_IPS=['127.0.0.1']
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        registry.reset()
+        self.addCleanup(registry.reset)
+        cache.clear()
+
+    def test_scrape_counts_requests_by_view(self):
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('posts:index'))
+        response = self.client.get(reverse('core:metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        samples = dict(
+            line.rsplit(' ', 1)
+            for line in response.content.decode().splitlines()
+            if not line.startswith('#')
+        )
+        labels = 'view="posts:index"'
+        self.assertEqual(
+            samples[f'yatube_requests_total{{{labels},status="200"}}'], '2'
+        )
+        self.assertEqual(
+            samples[f'yatube_request_duration_seconds_count{{{labels}}}'], '2'
+        )
+        self.assertEqual(
+            samples[f'yatube_response_size_bytes_count{{{labels}}}'], '2'
+        )
+        self.assertGreater(
+            int(samples[f'yatube_db_queries_total{{{labels}}}']), 0
+        )
+        # Вторая страница отдана из кэша.
+        hits = f'yatube_cache_requests_total{{{labels},result="hit"}}'
+        self.assertGreater(int(samples[hits]), 0)
+
+    def test_scrape_merges_other_workers(self):
+        self.client.get(reverse('posts:index'))
+        registry.flush()
+        with open(registry.path()) as file:
+            views = json.load(file)
+        # В имени есть время запуска: новый процесс с тем же pid
+        # не затрет снимок старого.
+        self.assertIn(f'-{os.getpid()}-', os.path.basename(registry.path()))
+        for name in ('other-1-1', 'dead-2-1'):
+            path = os.path.join(self.directory, f'{name}.json')
+            with open(path, 'w') as file:
+                json.dump(views, file)
+        # Снимок умершего воркера давно не обновлялся.
+        dead = os.path.join(self.directory, 'dead-2-1.json')
+        stale = time.time() - 3600
+        os.utime(dead, (stale, stale))
+        text = self.client.get(reverse('core:metrics')).content.decode()
+        self.assertIn(
+            'yatube_requests_total{view="posts:index",status="200"} 2', text
+        )
+        self.assertFalse(os.path.exists(dead))
+
+    def test_scrape_forbidden_for_other_addresses(self):
+        # По умолчанию адресов нет: за прокси все пришли бы с 127.0.0.1.
+        with self.settings(METRICS_ALLOWED_IPS=[]):
+            response = self.client.get(reverse('core:metrics'))
+        self.assertEqual(response.status_code, 403)
+        response = self.client.get(
+            reverse('core:metrics'), REMOTE_ADDR='192.0.2.1'
+        )
+        self.assertEqual(response.status_code, 403)
+        staff = User.objects.create(username='admin', is_staff=True)
+        self.client.force_login(staff)
+        response = self.client.get(
+            reverse('core:metrics'), REMOTE_ADDR='192.0.2.1'
+        )
+        self.assertEqual(response.status_code, 200)
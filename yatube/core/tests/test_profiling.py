@@ -0,0 +1,89 @@
+import os
+import tempfile
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post, User
+
+
+class ProfilingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='danil')
+        cls.staff = User.objects.create(username='admin', is_staff=True)
+        Post.objects.create(author=cls.author, text='Тестовый пост')
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        settings = override_settings(
+            PROFILING_DIR=self.directory,
+            PROFILING_SAMPLE_RATE=0,
+            PROFILING_KEEP=2,
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.client.force_login(self.staff)
+
+    def test_staff_flag_writes_bounded_ring(self):
+        url = reverse('posts:profile', args=(self.author.username,))
+        self.assertNotIn('X-Profile-Id', self.client.get(url))
+        for value in ('0', 'false', 'no'):
+            with self.subTest(value=value):
+                self.assertNotIn(
+                    'X-Profile-Id', self.client.get(url, {'profile': value})
+                )
+                self.assertNotIn(
+                    'X-Profile-Id', self.client.get(url, HTTP_X_PROFILE=value)
+                )
+        self.assertEqual(os.listdir(self.directory), [])
+        names = [
+            self.client.get(url, {'profile': 1})['X-Profile-Id'],
+            self.client.get(url, HTTP_X_PROFILE='True')['X-Profile-Id'],
+            self.client.get(url, {'profile': 1})['X-Profile-Id'],
+        ]
+        self.assertEqual(
+            sorted(os.listdir(self.directory)),
+            sorted(
+                f'{name}.{kind}' for name in names[1:]
+                for kind in ('prof', 'txt')
+            )
+        )
+        with open(os.path.join(self.directory, f'{names[-1]}.txt')) as file:
+            report = file.read()
+        self.assertIn(f'GET {url}?profile=1 -> 200', report)
+        self.assertIn('SELECT', report)
+        self.assertIn('posts_profile', names[-1])
+
+    def test_sampling_profiles_other_users(self):
+        self.client.logout()
+        with self.settings(PROFILING_SAMPLE_RATE=1):
+            response = self.client.get(reverse('posts:index'))
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertEqual(
+            sorted(os.path.splitext(name)[1] for name in os.listdir(
+                self.directory
+            )),
+            ['.prof', '.txt']
+        )
+
+    def test_pages_are_staff_only(self):
+        name = self.client.get(
+            reverse('posts:index'), {'profile': 1}
+        )['X-Profile-Id']
+        response = self.client.get(reverse('core:profiles'))
+        self.assertContains(response, name)
+        download = reverse('core:profile_download', args=(f'{name}.prof',))
+        response = self.client.get(download)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.has_header('Content-Disposition'))
+        self.assertEqual(
+            self.client.get(
+                reverse('core:profile_download', args=('..secret.txt',))
+            ).status_code,
+            404
+        )
+        self.client.force_login(self.author)
+        self.assertEqual(self.client.get(download).status_code, 302)
@@ -0,0 +1,47 @@
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from posts.models import Comment, Post, User
+
+from ..routers import (
+    PIN_COOKIE, ReplicaPinMiddleware, ReplicaRouter, _pinned_until, is_pinned,
+)
+
+
+@override_settings(DATABASE_REPLICAS=['replica'], REPLICA_PIN_SECONDS=5)
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+        _pinned_until.set(0)
+        self.addCleanup(_pinned_until.set, 0)
+
+    def test_reads_go_to_replica_until_write(self):
+        self.assertEqual(self.router.db_for_read(Post), 'replica')
+        self.assertEqual(self.router.db_for_read(User), 'default')
+        self.router.db_for_write(User)
+        self.assertEqual(self.router.db_for_read(Post), 'replica')
+        self.assertEqual(self.router.db_for_write(Comment), 'default')
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+        self.assertFalse(self.router.allow_migrate('replica', 'posts'))
+
+    def test_pin_travels_in_cookie(self):
+        def write(request):
+            self.router.db_for_write(Comment)
+            return HttpResponse()
+
+        def read(request):
+            self.pinned = is_pinned()
+            return HttpResponse()
+
+        factory = RequestFactory()
+        response = ReplicaPinMiddleware(write)(factory.post('/'))
+        self.assertFalse(is_pinned())
+        cookie = response.cookies[PIN_COOKIE]
+        self.assertEqual(cookie['max-age'], 5)
+        request = factory.get('/')
+        request.COOKIES[PIN_COOKIE] = cookie.value
+        response = ReplicaPinMiddleware(read)(request)
+        self.assertTrue(self.pinned)
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+        ReplicaPinMiddleware(read)(factory.get('/'))
+        self.assertFalse(self.pinned)
@@ -1,5 +1,12 @@
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.exceptions import PermissionDenied
+from django.http import FileResponse, Http404, HttpResponse
 from django.shortcuts import render
 
+from . import profiling
+from .metrics import CONTENT_TYPE, collect, render as render_metrics
+
 
 def page_not_found(request, exception):
     return render(request, 'core/404.html', {'path': request.path}, status=404)
@@ -15,3 +22,29 @@ def permission_denied(request, exception):
 
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
+
+
+def metrics(request):
+    """Метрики всех воркеров для Prometheus: с разрешенных адресов
+    или для персонала."""
+    if (
+        request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS
+        and not request.user.is_staff
+    ):
+        raise PermissionDenied
+    return HttpResponse(render_metrics(collect()), content_type=CONTENT_TYPE)
+
+
+@staff_member_required
+def profiles(request):
+    return render(
+        request, 'core/profiles.html', {'profiles': profiling.profiles()}
+    )
+
+
+@staff_member_required
+def profile_download(request, name):
+    path = profiling.profile_path(name)
+    if path is None:
+        raise Http404
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=name)
@@ -1,6 +1,7 @@
 from django.contrib import admin
 
 from .models import Post, Group, Comment, Follow
+from .search import search_posts
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -16,6 +17,11 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return search_posts(queryset, search_term), False
+
 
 class CommentAdmin(admin.ModelAdmin):
     list_display = ('post', 'author', 'text', 'created')
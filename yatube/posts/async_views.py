@@ -0,0 +1,21 @@
+from django.contrib.auth.views import redirect_to_login
+
+from core.asgi import async_variant, run_sync
+
+from . import views
+from .cache import cached_page
+
+
+@async_variant(views.index)
+@async_variant(views.group_posts)
+@async_variant(views.profile)
+@async_variant(views.post_detail)
+async def cached(request, *args, **kwargs):
+    """Страница из кэша анонимов; промах отдается обычному view."""
+    return await run_sync(cached_page, request)
+
+
+@async_variant(views.follow_index)
+async def follow_index(request):
+    """Анониму лента недоступна: редирект без потока и базы."""
+    return redirect_to_login(request.get_full_path())
@@ -0,0 +1,145 @@
+import random
+from datetime import datetime, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+from faker import Faker
+
+from . import feed, stats
+from .models import Comment, Follow, Group, Post, User
+
+BATCH_SIZE = 500
+# Даты отсчитываются от фиксированного момента, чтобы набор данных не
+# зависел от дня запуска.
+EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+DATASET_DAYS = 365
+READER_FOLLOWS = 20
+METRICS = ('p50_ms', 'p95_ms', 'p99_ms', 'mean_ms', 'queries', 'peak_kib')
+# Рост этих метрик больше допуска - регрессия; запросов - любой рост.
+REGRESSION_METRICS = ('p95_ms', 'queries', 'peak_kib')
+
+
+def dated(rng, count):
+    return sorted(
+        EPOCH - timedelta(seconds=rng.randrange(DATASET_DAYS * 24 * 3600))
+        for _ in range(count)
+    )
+
+
+def restore_dates(model, field, dates):
+    """auto_now_add перезаписывает даты при вставке: ставим свои."""
+    objects = list(model.objects.only('id').order_by('id'))
+    for obj, date in zip(objects, dates):
+        setattr(obj, field, date)
+    model.objects.bulk_update(objects, [field], batch_size=BATCH_SIZE)
+
+
+@transaction.atomic
+def build_dataset(users, groups, posts, comments, follows, seed):
+    """Заполняет пустую базу одинаковыми при одном seed данными.
+
+    Первый пользователь - читатель с подписками для ленты.
+    """
+    rng = random.Random(seed)
+    fake = Faker('ru_RU')
+    fake.seed_instance(seed)
+    password = make_password(None)
+    User.objects.bulk_create(
+        (
+            User(username=f'{fake.user_name()}{number}', password=password)
+            for number in range(users)
+        ),
+        batch_size=BATCH_SIZE
+    )
+    user_ids = list(User.objects.order_by('id').values_list('id', flat=True))
+    Group.objects.bulk_create(
+        Group(
+            title=fake.sentence(nb_words=3)[:200],
+            slug=f'group-{number}',
+            description=fake.paragraph(),
+        )
+        for number in range(groups)
+    )
+    group_ids = list(Group.objects.order_by('id').values_list('id', flat=True))
+    Post.objects.bulk_create(
+        (
+            Post(
+                author_id=rng.choice(user_ids),
+                group_id=rng.choice(group_ids) if rng.random() < 0.7 else None,
+                text=fake.paragraph(nb_sentences=rng.randint(2, 12)),
+            )
+            for _ in range(posts)
+        ),
+        batch_size=BATCH_SIZE
+    )
+    restore_dates(Post, 'pub_date', dated(rng, posts))
+    post_ids = list(Post.objects.order_by('id').values_list('id', flat=True))
+    Comment.objects.bulk_create(
+        (
+            Comment(
+                post_id=rng.choice(post_ids),
+                author_id=rng.choice(user_ids),
+                text=fake.sentence(),
+            )
+            for _ in range(comments)
+        ),
+        batch_size=BATCH_SIZE
+    )
+    restore_dates(Comment, 'created', dated(rng, comments))
+    pairs = {
+        (user_ids[0], author_id)
+        for author_id in user_ids[1:READER_FOLLOWS + 1]
+    }
+    while len(pairs) < min(follows, len(user_ids) * (len(user_ids) - 1)):
+        user_id, author_id = rng.sample(user_ids, 2)
+        pairs.add((user_id, author_id))
+    Follow.objects.bulk_create(
+        (
+            Follow(user_id=user_id, author_id=author_id)
+            for user_id, author_id in sorted(pairs)
+        ),
+        batch_size=BATCH_SIZE
+    )
+    feed.rebuild(None)
+    stats.reconcile(user_ids)
+
+
+def targets():
+    """Читатель и самые нагруженные группа, автор и пост."""
+    return {
+        'reader': User.objects.order_by('id').first(),
+        'group': Group.objects.annotate(
+            count=Count('posts')
+        ).order_by('-count', 'id').first(),
+        'author': User.objects.annotate(
+            count=Count('posts')
+        ).order_by('-count', 'id').first(),
+        'post': Post.objects.annotate(
+            count=Count('comments')
+        ).order_by('-count', 'id').first(),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Строки сравнения с базовым прогоном и список регрессий."""
+    lines = []
+    regressions = []
+    for view, metrics in results['views'].items():
+        before = baseline.get('views', {}).get(view)
+        if before is None:
+            lines.append(f'{view}: нет в базовом прогоне')
+            continue
+        for metric in METRICS:
+            old, new = before.get(metric), metrics[metric]
+            if not old:
+                continue
+            change = (new - old) / old
+            lines.append(
+                f'{view} {metric}: {old:.1f} -> {new:.1f} ({change:+.0%})'
+            )
+            limit = 0 if metric == 'queries' else tolerance
+            if metric in REGRESSION_METRICS and change > limit:
+                regressions.append(f'{view} {metric} {change:+.0%}')
+    return lines, regressions
@@ -0,0 +1,172 @@
+import hashlib
+import time
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+from django.urls import NoReverseMatch, reverse
+from django.utils.cache import get_conditional_response
+
+from .models import Group
+
+GENERATION_KEY = 'posts:generation'
+PATH_VERSION_KEY = 'page_version:{}'
+PAGE_KEY = 'page:{}'
+PAGE_TIMEOUT = 60 * 10
+# Параметры, от которых зависят страницы: номер страницы и курсор.
+PAGE_PARAMS = ('after', 'before', 'page')
+
+
+def _initial_generation():
+    # Начало отсчета от времени, чтобы после сброса кэша поколение
+    # не совпало с уже выданным раньше.
+    return int(time.time() * 1000)
+
+
+def _get_counter(key):
+    value = cache.get(key)
+    if value is None:
+        cache.add(key, _initial_generation(), None)
+        value = cache.get(key)
+    return value
+
+
+def _bump_counter(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _initial_generation(), None)
+
+
+def get_generation():
+    """Номер поколения контента: меняется при любой правке постов."""
+    return _get_counter(GENERATION_KEY)
+
+
+def bump_generation():
+    _bump_counter(GENERATION_KEY)
+
+
+def page_query(request):
+    """Строка запроса только из PAGE_PARAMS в постоянном порядке: метки
+    вроде ?utm=... не плодят в кэше копии одной страницы."""
+    return urlencode([
+        (name, value)
+        for name in PAGE_PARAMS
+        for value in request.GET.getlist(name)
+    ])
+
+
+def fragment_key(request):
+    """Ключ фрагмента списка: поколение плюс страница или курсор."""
+    return f'{get_generation()}:{page_query(request)}'
+
+
+def page_key(request, version_path=None):
+    """Ключ ответа; версия берется у version_path, если он задан."""
+    path = request.path
+    version = _get_counter(PATH_VERSION_KEY.format(version_path or path))
+    raw = f'{version}:{path}?{page_query(request)}'
+    return PAGE_KEY.format(hashlib.md5(raw.encode()).hexdigest())
+
+
+def parent_path(request):
+    """/group/slug/rss/ -> /group/slug/: лента живет по версии страницы."""
+    return request.path.rsplit('/', 2)[0] + '/'
+
+
+def group_path(slug):
+    """Адрес группы; у группы с недопустимым слагом страницы нет."""
+    try:
+        return reverse('posts:group_list', args=(slug,))
+    except NoReverseMatch:
+        return None
+
+
+def purge_paths(*paths):
+    """Сбрасывает сохраненные страницы по адресу со всеми параметрами."""
+    for path in set(paths) - {None}:
+        _bump_counter(PATH_VERSION_KEY.format(path))
+
+
+def purge_post(post, group_ids=()):
+    paths = [
+        reverse('posts:index'),
+        reverse('posts:profile', args=(post.author.username,)),
+        reverse('posts:post_detail', args=(post.id,)),
+        reverse('posts:post_comments', args=(post.id,)),
+    ]
+    paths.extend(
+        group_path(slug)
+        for slug in Group.objects.filter(
+            id__in={post.group_id, *group_ids} - {None}
+        ).values_list('slug', flat=True)
+    )
+    purge_paths(*paths)
+
+
+def cache_anonymous_page(view, version_path=None):
+    """Хранит готовые ответы для анонимов; авторизованным - всегда view.
+
+    version_path(request) задает страницу, чей сброс сбрасывает и этот
+    ответ: так ленты RSS обновляются вместе со своими страницами.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if (
+            request.method not in ('GET', 'HEAD')
+            or request.user.is_authenticated
+        ):
+            return view(request, *args, **kwargs)
+        key = page_key(request, version_path and version_path(request))
+        response = cached_page(request, key)
+        if response is None:
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200 and not response.cookies:
+                cache.set(key, response, PAGE_TIMEOUT)
+        return response
+    return wrapper
+
+
+def cached_page(request, key=None):
+    """Сохраненный для анонима ответ (или 304 к нему) либо None."""
+    response = cache.get(key or page_key(request))
+    if response is None:
+        return None
+    # Сохраненная страница сбрасывается при правках, значит ее
+    # валидаторы еще верны и сверить их можно без базы.
+    return get_conditional_response(
+        request, etag=response.get('ETag'), response=response
+    )
+
+
+def conditional_page(state):
+    """Отвечает 304, если страница не менялась, не вызывая view.
+
+    state(request, *args, **kwargs) дешево возвращает состояние страницы
+    или None, если страницы нет. ETag строится из состояния, пользователя
+    и параметров запроса. Last-Modified не отдается: после удаления поста
+    или комментария и после подписки дата последней правки не растет,
+    и If-Modified-Since получал бы 304 к устаревшей странице.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            value = state(request, *args, **kwargs)
+            if value is None:
+                return view(request, *args, **kwargs)
+            raw = f'{value!r}:{request.user.pk}:{request.GET.urlencode()}'
+            etag = f'W/"{hashlib.md5(raw.encode()).hexdigest()}"'
+            response = get_conditional_response(request, etag=etag)
+            if response is None:
+                response = view(request, *args, **kwargs)
+            if response.status_code == 200:
+                response.setdefault('ETag', etag)
+                # Ленты ставят дату последнего поста сами.
+                if response.has_header('Last-Modified'):
+                    del response['Last-Modified']
+            return response
+        return wrapper
+    return decorator
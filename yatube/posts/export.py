@@ -0,0 +1,107 @@
+import json
+import time
+import zipfile
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+CHUNK_SIZE = 500
+FILE_CHUNK_SIZE = 64 * 1024
+CONTENT_NAME = 'content.ndjson'
+IMAGES_DIR = 'images/'
+
+
+def records(author):
+    """Автор, затем его посты и комментарии по одному словарю.
+
+    iterator(chunk_size) не держит в памяти весь queryset, поэтому
+    выгрузка плодовитого автора занимает память одной пачки.
+    """
+    yield {'type': 'author', 'id': author.id, 'username': author.username}
+    for post in author.posts.select_related('group').order_by(
+        'id'
+    ).iterator(chunk_size=CHUNK_SIZE):
+        yield {
+            'type': 'post',
+            'id': post.id,
+            'text': post.text,
+            'pub_date': post.pub_date,
+            'updated': post.updated,
+            'group': post.group and post.group.slug,
+            'image': post.image.name or None,
+        }
+    for comment in author.comments.order_by('id').iterator(
+        chunk_size=CHUNK_SIZE
+    ):
+        yield {
+            'type': 'comment',
+            'id': comment.id,
+            'post': comment.post_id,
+            'text': comment.text,
+            'created': comment.created,
+        }
+
+
+def ndjson(author):
+    for record in records(author):
+        yield (
+            json.dumps(record, cls=DjangoJSONEncoder, ensure_ascii=False)
+            + '\n'
+        ).encode()
+
+
+class StreamBuffer:
+    """Файл только для записи: zipfile пишет сюда, а генератор сразу
+    забирает написанное. Без seek zipfile сам пишет дескрипторы данных
+    после каждого файла, и архив не нужно держать целиком."""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def zip_archive(author):
+    """ZIP с content.ndjson и картинками постов, отдаваемый кусками."""
+    buffer = StreamBuffer()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        info = zipfile.ZipInfo(CONTENT_NAME, time.localtime()[:6])
+        info.compress_type = zipfile.ZIP_DEFLATED
+        with archive.open(info, 'w') as entry:
+            for line in ndjson(author):
+                entry.write(line)
+                if buffer.chunks:
+                    yield buffer.take()
+        images = author.posts.exclude(image='').order_by('id')
+        for post in images.only('id', 'image', 'updated').iterator(
+            chunk_size=CHUNK_SIZE
+        ):
+            try:
+                source = post.image.open('rb')
+            except FileNotFoundError:
+                continue
+            # Картинки уже сжаты, поэтому кладутся как есть.
+            info = zipfile.ZipInfo(
+                IMAGES_DIR + post.image.name, post.updated.timetuple()[:6]
+            )
+            info.compress_type = zipfile.ZIP_STORED
+            with source, archive.open(info, 'w') as entry:
+                for chunk in iter(lambda: source.read(FILE_CHUNK_SIZE), b''):
+                    entry.write(chunk)
+                    if buffer.chunks:
+                        yield buffer.take()
+    yield buffer.take()
@@ -0,0 +1,69 @@
+from collections import defaultdict
+
+from .models import FeedEntry, Follow, Post
+
+BATCH_SIZE = 1000
+
+
+def _insert(entries):
+    batch = []
+    for entry in entries:
+        batch.append(entry)
+        if len(batch) == BATCH_SIZE:
+            FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def fan_out(post):
+    """Кладет новый пост во входящие всех подписчиков автора."""
+    _insert(
+        FeedEntry(user_id=user_id, post_id=post.id, pub_date=post.pub_date)
+        for user_id in Follow.objects.filter(
+            author_id=post.author_id
+        ).values_list('user_id', flat=True).iterator()
+    )
+
+
+def fan_out_many(posts):
+    """Как fan_out, но подписчики всей пачки выбираются одним запросом."""
+    by_author = defaultdict(list)
+    for post in posts:
+        by_author[post.author_id].append(post)
+    _insert(
+        FeedEntry(user_id=user_id, post_id=post.id, pub_date=post.pub_date)
+        for user_id, author_id in Follow.objects.filter(
+            author_id__in=list(by_author)
+        ).values_list('user_id', 'author_id').iterator()
+        for post in by_author[author_id]
+    )
+
+
+def backfill(user_id, author_id):
+    _insert(
+        FeedEntry(user_id=user_id, post_id=post_id, pub_date=pub_date)
+        for post_id, pub_date in Post.objects.filter(
+            author_id=author_id
+        ).values_list('id', 'pub_date').iterator()
+    )
+
+
+def prune(user_id, author_id):
+    FeedEntry.objects.filter(
+        user_id=user_id, post__author_id=author_id
+    ).delete()
+
+
+def rebuild(user_ids=None):
+    """Пересобирает входящие целиком, по умолчанию для всех."""
+    follows = Follow.objects.all()
+    entries = FeedEntry.objects.all()
+    if user_ids is not None:
+        follows = follows.filter(user_id__in=user_ids)
+        entries = entries.filter(user_id__in=user_ids)
+    entries.delete()
+    for user_id, author_id in follows.values_list(
+        'user_id', 'author_id'
+    ).iterator():
+        backfill(user_id, author_id)
@@ -0,0 +1,117 @@
+from django.contrib.syndication.views import Feed
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.text import Truncator
+
+from .cache import cache_anonymous_page, conditional_page, parent_path
+from .models import Group, User
+from .queries import (
+    author_post_list, group_post_list, group_state, index_state, post_list,
+    profile_state,
+)
+
+FEED_SIZE = 20
+FEED_FIELDS = ('author', 'group')
+TITLE_WORDS = 8
+
+
+class PostsFeed(Feed):
+    title = 'Yatube: последние записи'
+    description = 'Новые посты всех авторов'
+
+    def link(self):
+        return reverse('posts:index')
+
+    def items(self):
+        return post_list(FEED_FIELDS)[:FEED_SIZE]
+
+    def item_title(self, post):
+        return Truncator(post.text).words(TITLE_WORDS)
+
+    def item_description(self, post):
+        return post.text
+
+    def item_link(self, post):
+        return reverse('posts:post_detail', args=(post.id,))
+
+    def item_author_name(self, post):
+        return post.author.get_full_name() or post.author.username
+
+    def item_pubdate(self, post):
+        return post.pub_date
+
+    def item_updateddate(self, post):
+        return post.updated
+
+    def item_categories(self, post):
+        return (post.group.title,) if post.group else ()
+
+
+class GroupFeed(PostsFeed):
+    def get_object(self, request, slug):
+        return get_object_or_404(Group, slug=slug)
+
+    def title(self, group):
+        return f'Yatube: {group.title}'
+
+    def description(self, group):
+        return group.description
+
+    def link(self, group):
+        return reverse('posts:group_list', args=(group.slug,))
+
+    def items(self, group):
+        return group_post_list(group, FEED_FIELDS)[:FEED_SIZE]
+
+
+class AuthorFeed(PostsFeed):
+    def get_object(self, request, username):
+        return get_object_or_404(User, username=username)
+
+    def title(self, author):
+        return f'Yatube: записи {author.username}'
+
+    def description(self, author):
+        return f'Новые посты пользователя {author.username}'
+
+    def link(self, author):
+        return reverse('posts:profile', args=(author.username,))
+
+    def items(self, author):
+        return author_post_list(author, FEED_FIELDS)[:FEED_SIZE]
+
+
+class AtomMixin:
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self._get_dynamic_attr('description', obj)
+
+
+class PostsAtomFeed(AtomMixin, PostsFeed):
+    pass
+
+
+class GroupAtomFeed(AtomMixin, GroupFeed):
+    pass
+
+
+class AuthorAtomFeed(AtomMixin, AuthorFeed):
+    pass
+
+
+def cached(feed, state):
+    """Лента рендерится один раз на правку своей страницы и отдается
+    из кэша с ETag."""
+    return cache_anonymous_page(
+        conditional_page(state)(feed), version_path=parent_path
+    )
+
+
+posts_rss = cached(PostsFeed(), index_state)
+posts_atom = cached(PostsAtomFeed(), index_state)
+group_rss = cached(GroupFeed(), group_state)
+group_atom = cached(GroupAtomFeed(), group_state)
+author_rss = cached(AuthorFeed(), profile_state)
+author_atom = cached(AuthorAtomFeed(), profile_state)
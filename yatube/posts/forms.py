@@ -1,6 +1,8 @@
+from django.core.files.uploadedfile import UploadedFile
 from django.forms import ModelForm
 
 from .models import Post, Comment
+from .uploads import LimitedImageField, normalize_image
 
 
 class PostForm(ModelForm):
@@ -12,6 +14,13 @@ class PostForm(ModelForm):
             'text': 'Текст нового поста',
             'group': 'Группа, к которой будет относиться пост'
         }
+        field_classes = {'image': LimitedImageField}
+
+    def clean_image(self):
+        image = self.cleaned_data['image']
+        if isinstance(image, UploadedFile):
+            return normalize_image(image)
+        return image
 
 
 class CommentForm(ModelForm):
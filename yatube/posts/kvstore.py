@@ -0,0 +1,139 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from sorl.thumbnail.kvstores.base import KVStoreBase
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS kvstore '
+    '(key TEXT PRIMARY KEY, value TEXT NOT NULL) WITHOUT ROWID'
+)
+BUSY_TIMEOUT = 5000
+BATCH_SIZE = 500
+
+
+class KVStore(KVStoreBase):
+    """Метаданные sorl-thumbnail в одном SQLite-файле на всех воркеров.
+
+    Файл переживает перезапуски, поэтому после деплоя миниатюры не
+    проверяются в хранилище заново. WAL позволяет читать параллельно
+    с записью из других процессов.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._local = threading.local()
+
+    @property
+    def connection(self):
+        path = settings.THUMBNAIL_KVSTORE_PATH
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.path != path:
+            if connection is not None:
+                connection.close()
+            connection = sqlite3.connect(
+                path, timeout=BUSY_TIMEOUT / 1000, isolation_level=None,
+                check_same_thread=False,
+            )
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(SCHEMA)
+            self._local.connection = connection
+            self._local.path = path
+        return connection
+
+    @contextmanager
+    def transaction(self):
+        """Короткая транзакция только с записями в хранилище."""
+        connection = self.connection
+        if connection.in_transaction:
+            yield connection
+            return
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            yield connection
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+
+    @contextmanager
+    def batch(self):
+        """Копит записи блока в памяти и пишет их одной транзакцией.
+
+        Блокировку записи SQLite берет только на вставку: пока внутри
+        блока строятся миниатюры, запросы сайта пишут в хранилище
+        без ожидания.
+        """
+        if getattr(self._local, 'pending', None) is not None:
+            yield
+            return
+        self._local.pending = {}
+        try:
+            yield
+            pending = self._local.pending
+        finally:
+            self._local.pending = None
+        if pending:
+            with self.transaction() as connection:
+                connection.executemany(
+                    'INSERT OR REPLACE INTO kvstore (key, value) '
+                    'VALUES (?, ?)',
+                    pending.items()
+                )
+
+    def count(self):
+        return self.connection.execute(
+            'SELECT COUNT(*) FROM kvstore'
+        ).fetchone()[0]
+
+    def _get_raw(self, key):
+        pending = getattr(self._local, 'pending', None)
+        if pending and key in pending:
+            return pending[key]
+        row = self.connection.execute(
+            'SELECT value FROM kvstore WHERE key = ?', (key,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def _set_raw(self, key, value):
+        pending = getattr(self._local, 'pending', None)
+        if pending is not None:
+            pending[key] = value
+            return
+        self.connection.execute(
+            'INSERT OR REPLACE INTO kvstore (key, value) VALUES (?, ?)',
+            (key, value)
+        )
+
+    def _delete_raw(self, *keys):
+        pending = getattr(self._local, 'pending', None)
+        if pending:
+            for key in keys:
+                pending.pop(key, None)
+        with self.transaction() as connection:
+            for start in range(0, len(keys), BATCH_SIZE):
+                chunk = keys[start:start + BATCH_SIZE]
+                connection.execute(
+                    'DELETE FROM kvstore WHERE key IN ({})'.format(
+                        ', '.join('?' * len(chunk))
+                    ),
+                    chunk
+                )
+
+    def _find_keys_raw(self, prefix):
+        escaped = prefix
+        for char in ('\\', '%', '_'):
+            escaped = escaped.replace(char, '\\' + char)
+        keys = [
+            key for key, in self.connection.execute(
+                "SELECT key FROM kvstore WHERE key LIKE ? ESCAPE '\\'",
+                (escaped + '%',)
+            )
+        ]
+        pending = getattr(self._local, 'pending', None) or {}
+        return keys + [
+            key for key in pending
+            if key.startswith(prefix) and key not in keys
+        ]
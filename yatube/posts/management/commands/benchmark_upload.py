@@ -0,0 +1,103 @@
+import multiprocessing
+import os
+import resource
+import shutil
+import tempfile
+
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.core.management.base import BaseCommand
+from PIL import Image
+
+from posts.uploads import LimitedImageField, normalize_image
+
+SAMPLES = (
+    ('photo-2mp.jpg', 'RGB', (1600, 1200), 'JPEG'),
+    ('photo-24mp.jpg', 'RGB', (6000, 4000), 'JPEG'),
+    ('scan-36mp.png', 'RGB', (6000, 6000), 'PNG'),
+    ('bomb-400mp.png', '1', (20000, 20000), 'PNG'),
+)
+PROCESSORS = ('bounded', 'unbounded')
+
+
+class SampleUpload(File):
+    content_type = 'application/octet-stream'
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def peak_rss():
+    """Пиковый RSS процесса в МБ.
+
+    ru_maxrss переживает fork и exec и достается от родителя, поэтому
+    на Linux берется VmHWM, который считается для своего адресного
+    пространства.
+    """
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def process(path, processor):
+    if processor == 'unbounded':
+        Image.MAX_IMAGE_PIXELS = None
+        with Image.open(path) as image:
+            image.load()
+        return 'декодировано целиком'
+    with open(path, 'rb') as file:
+        upload = LimitedImageField().clean(SampleUpload(file))
+        normalized = normalize_image(upload)
+        return f'принято, сохранится {normalized.size // 1024} КБ'
+
+
+def measure(path, processor, results):
+    """Выполняется в отдельном процессе, чтобы пик RSS был только свой."""
+    before = peak_rss()
+    try:
+        result = process(path, processor)
+    except ValidationError as error:
+        result = 'отклонено: ' + ' '.join(error.messages)
+    except Exception as error:
+        result = f'ошибка: {error}'
+    results.put((result, peak_rss() - before))
+
+
+class Command(BaseCommand):
+    help = 'Показывает пиковый RSS на одну загрузку картинки'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processor',
+            choices=PROCESSORS,
+            action='append',
+            help='Способ обработки (по умолчанию оба для сравнения)'
+        )
+
+    def handle(self, *args, **options):
+        processors = options['processor'] or PROCESSORS
+        context = multiprocessing.get_context('spawn')
+        directory = tempfile.mkdtemp()
+        try:
+            for name, mode, size, image_format in SAMPLES:
+                path = os.path.join(directory, name)
+                Image.new(mode, size).save(path, image_format)
+                for processor in processors:
+                    results = context.Queue()
+                    worker = context.Process(
+                        target=measure, args=(path, processor, results)
+                    )
+                    worker.start()
+                    result, rss = results.get()
+                    worker.join()
+                    self.stdout.write(
+                        f'{name:16} {os.path.getsize(path) // 1024:>8} КБ '
+                        f'{processor:10} {rss:>8.1f} МБ  {result}'
+                    )
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
@@ -0,0 +1,186 @@
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+
+import django
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import (
+    CaptureQueriesContext, override_settings, setup_test_environment,
+    teardown_test_environment,
+)
+from django.urls import reverse
+
+from core.cache import isolated_caches
+from posts.benchmark import build_dataset, compare, targets
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет index, group_posts, profile, post_detail и follow_index '
+        'на одинаковом при одном --seed наборе данных во временной базе'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--groups', type=int, default=10)
+        parser.add_argument('--posts', type=int, default=5000)
+        parser.add_argument('--comments', type=int, default=20000)
+        parser.add_argument('--follows', type=int, default=2000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument(
+            '--repeat', type=int, default=50, help='Замеров на страницу'
+        )
+        parser.add_argument(
+            '--warmup', type=int, default=3, help='Прогревочных запросов'
+        )
+        parser.add_argument('--output', help='Куда записать JSON')
+        parser.add_argument('--baseline', help='JSON прошлого прогона')
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=0.2,
+            help='Допустимый рост p95 и памяти относительно базового'
+        )
+
+    def handle(self, *args, **options):
+        if options['users'] < 2:
+            raise CommandError('Нужно хотя бы два пользователя')
+        if options['repeat'] < 2:
+            raise CommandError('Для перцентилей нужно хотя бы два замера')
+        dataset = {
+            name: options[name]
+            for name in ('users', 'groups', 'posts', 'comments', 'follows',
+                         'seed')
+        }
+        # Без DEBUG, как в продакшене: панель отладки не подменяет курсор.
+        setup_test_environment(debug=False)
+        # Реплики смотрят в рабочие файлы: все чтения идут во временную
+        # базу с набором данных.
+        isolated = override_settings(
+            CACHES=isolated_caches('benchmark'), DATABASE_REPLICAS=[]
+        )
+        isolated.enable()
+        # Как у тестов: своя база, рабочая не трогается.
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True
+        )
+        try:
+            started = time.perf_counter()
+            build_dataset(**dataset)
+            self.stdout.write(
+                f'Данные созданы за {time.perf_counter() - started:.1f} с'
+            )
+            results = {
+                'meta': {
+                    'dataset': dataset,
+                    'repeat': options['repeat'],
+                    'python': platform.python_version(),
+                    'django': django.get_version(),
+                    'database': connection.vendor,
+                },
+                'views': self.measure_all(options),
+            }
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            isolated.disable()
+            teardown_test_environment()
+        self.report(results)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump(results, file, indent=2, ensure_ascii=False)
+        if options['baseline']:
+            self.check_baseline(results, options)
+
+    def pages(self):
+        found = targets()
+        return {
+            'index': reverse('posts:index'),
+            'group_posts': reverse(
+                'posts:group_list', args=(found['group'].slug,)
+            ),
+            'profile': reverse(
+                'posts:profile', args=(found['author'].username,)
+            ),
+            'post_detail': reverse(
+                'posts:post_detail', args=(found['post'].id,)
+            ),
+            'follow_index': reverse('posts:follow_index'),
+        }, found['reader']
+
+    def measure_all(self, options):
+        pages, reader = self.pages()
+        client = Client()
+        # Авторизованному страницы не отдаются из кэша целиком.
+        client.force_login(reader)
+        return {
+            name: self.measure(client, url, options)
+            for name, url in pages.items()
+        }
+
+    def request(self, client, url):
+        """Запрос мимо кэша; возвращает время ответа в мс без очистки."""
+        cache.clear()
+        started = time.perf_counter()
+        response = client.get(url)
+        elapsed = (time.perf_counter() - started) * 1000
+        if response.status_code != 200:
+            raise CommandError(f'{url} ответил {response.status_code}')
+        return elapsed
+
+    def measure(self, client, url, options):
+        for _ in range(options['warmup']):
+            self.request(client, url)
+        latencies = [
+            self.request(client, url) for _ in range(options['repeat'])
+        ]
+        with CaptureQueriesContext(connection) as context:
+            self.request(client, url)
+        # Список запросов читается из журнала соединения лениво, а
+        # следующий запрос журнал очищает.
+        queries = len(context)
+        tracemalloc.start()
+        try:
+            self.request(client, url)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        percentiles = statistics.quantiles(latencies, n=100)
+        return {
+            'p50_ms': round(percentiles[49], 2),
+            'p95_ms': round(percentiles[94], 2),
+            'p99_ms': round(percentiles[98], 2),
+            'mean_ms': round(statistics.mean(latencies), 2),
+            'queries': queries,
+            'peak_kib': round(peak / 1024, 1),
+        }
+
+    def report(self, results):
+        for name, metrics in results['views'].items():
+            self.stdout.write(
+                f'{name:13} p50 {metrics["p50_ms"]:7.2f} мс  '
+                f'p95 {metrics["p95_ms"]:7.2f} мс  '
+                f'p99 {metrics["p99_ms"]:7.2f} мс  '
+                f'запросов {metrics["queries"]:3}  '
+                f'память {metrics["peak_kib"]:8.1f} КиБ'
+            )
+
+    def check_baseline(self, results, options):
+        with open(options['baseline']) as file:
+            baseline = json.load(file)
+        if baseline.get('meta', {}).get('dataset') != results['meta'][
+            'dataset'
+        ]:
+            self.stderr.write(
+                'Базовый прогон сделан на других данных: сравнение условно'
+            )
+        lines, regressions = compare(results, baseline, options['tolerance'])
+        for line in lines:
+            self.stdout.write(line)
+        if regressions:
+            raise CommandError('Регрессии: ' + ', '.join(regressions))
+        self.stdout.write(self.style.SUCCESS('Регрессий нет'))
@@ -0,0 +1,44 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import export
+from posts.models import User
+
+
+class Command(BaseCommand):
+    help = 'Выгружает посты и комментарии автора в NDJSON или ZIP'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username', help='Имя автора')
+        parser.add_argument(
+            '--format',
+            choices=('ndjson', 'zip'),
+            default='ndjson',
+            help='NDJSON или ZIP вместе с картинками'
+        )
+        parser.add_argument(
+            '--output',
+            help='Файл для выгрузки (по умолчанию stdout)'
+        )
+
+    def handle(self, *args, **options):
+        author = User.objects.filter(username=options['username']).first()
+        if author is None:
+            raise CommandError(f'Нет автора {options["username"]}')
+        if options['format'] == 'zip':
+            chunks = export.zip_archive(author)
+        else:
+            chunks = export.ndjson(author)
+        output = (
+            open(options['output'], 'wb') if options['output']
+            else sys.stdout.buffer
+        )
+        try:
+            for chunk in chunks:
+                output.write(chunk)
+        finally:
+            if options['output']:
+                output.close()
+            else:
+                output.flush()
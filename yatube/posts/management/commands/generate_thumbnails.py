@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Строит миниатюры для постов, у которых они еще не готовы'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Перестроить миниатюры всех постов с картинками'
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='')
+        if not options['all']:
+            posts = posts.filter(thumbnails_ready=False)
+        count = 0
+        for post_id in posts.values_list('id', flat=True).iterator():
+            thumbnails.generate(post_id)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано постов: {count}'
+        ))
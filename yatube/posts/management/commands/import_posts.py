@@ -0,0 +1,363 @@
+import csv
+import json
+import os
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.files import File
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Max
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts import feed, stats
+from posts.cache import bump_generation, group_path, purge_paths
+from posts.models import Comment, Group, Post, User
+
+BATCH_SIZE = 500
+CACHE_SIZE = 10000
+FORMATS = ('jsonl', 'csv')
+
+
+class Skip(Exception):
+    """Запись пропускается, причина - текст исключения."""
+
+
+class LookupCache:
+    """id по ключу (имени автора, слагу группы), добираемые пачками.
+
+    Размер ограничен, чтобы память не росла с числом авторов в файле.
+    """
+
+    def __init__(self, queryset, field):
+        self.queryset = queryset
+        self.field = field
+        self.ids = {}
+
+    def resolve(self, keys):
+        """Добирает id для keys - всех ключей текущей пачки."""
+        keys = set(keys)
+        missing = keys - set(self.ids)
+        if not missing:
+            return
+        if len(self.ids) + len(missing) > CACHE_SIZE:
+            # Вытесняются только ключи других пачек: get() по этой
+            # пачке должен находить все, что есть в базе.
+            self.ids = {
+                key: value for key, value in self.ids.items() if key in keys
+            }
+        self.ids.update(
+            self.queryset.filter(
+                **{f'{self.field}__in': missing}
+            ).values_list(self.field, 'id')
+        )
+
+    def get(self, key):
+        return self.ids.get(key)
+
+
+def parse_date(value):
+    if not value:
+        return None
+    date = parse_datetime(value)
+    if date is None:
+        raise Skip(f'непонятная дата {value!r}')
+    if timezone.is_naive(date):
+        date = timezone.make_aware(date)
+    return date
+
+
+def assign_ids(model, objects):
+    """SQLite не возвращает id из bulk_create: резервируем их сами внутри
+    транзакции, чтобы привязать комментарии, ленты и вернуть даты.
+
+    id берутся из счетчика AUTOINCREMENT (sqlite_sequence), поэтому id
+    удаленных записей не выдаются снова. Счетчик сдвигается первым же
+    оператором: запись берет блокировку до чтения, и пост, созданный на
+    сайте в это время, получит id уже после пачки.
+    """
+    if connection.features.can_return_ids_from_bulk_insert or not objects:
+        return
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'UPDATE sqlite_sequence SET seq = seq + %s WHERE name = %s',
+            [len(objects), table]
+        )
+        if not cursor.rowcount:
+            # В таблицу еще не вставляли: счетчика нет.
+            last = model.objects.aggregate(last=Max('id'))['last'] or 0
+            cursor.execute(
+                'INSERT INTO sqlite_sequence (name, seq) VALUES (%s, %s)',
+                [table, last + len(objects)]
+            )
+        cursor.execute(
+            'SELECT seq FROM sqlite_sequence WHERE name = %s', [table]
+        )
+        last = cursor.fetchone()[0]
+    for offset, obj in enumerate(objects, last - len(objects) + 1):
+        obj.id = offset
+
+
+class Command(BaseCommand):
+    help = (
+        'Импортирует посты с комментариями из JSONL или CSV пачками; '
+        'прерванный импорт продолжается с последней пачки'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл .jsonl или .csv')
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            help='Формат файла (по умолчанию по расширению)'
+        )
+        parser.add_argument(
+            '--images',
+            help='Каталог, относительно которого указаны картинки'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Записей в одной транзакции'
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='Файл прогресса (по умолчанию <path>.checkpoint)'
+        )
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            help='Начать сначала, не глядя на файл прогресса'
+        )
+        parser.add_argument(
+            '--create-users',
+            action='store_true',
+            help='Создавать неизвестных авторов без пароля'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or (
+            'csv' if path.endswith('.csv') else 'jsonl'
+        )
+        self.images = options['images'] and os.path.realpath(
+            options['images']
+        )
+        self.create_users = options['create_users']
+        self.users = LookupCache(User.objects.all(), 'username')
+        self.groups = LookupCache(Group.objects.all(), 'slug')
+        checkpoint = options['checkpoint'] or f'{path}.checkpoint'
+        done = 0
+        if not options['restart'] and os.path.exists(checkpoint):
+            with open(checkpoint) as file:
+                done = int(file.read() or 0)
+            self.stdout.write(f'Продолжаем после записи {done}')
+        totals = {'posts': 0, 'comments': 0, 'skipped': 0}
+        try:
+            source = open(path, encoding='utf-8', newline='')
+        except OSError as error:
+            raise CommandError(error)
+        with source:
+            records = self.read(source, file_format, done)
+            while True:
+                chunk = list(islice(records, options['batch_size']))
+                if not chunk:
+                    break
+                posts, comments, skipped = self.import_chunk(chunk)
+                done = chunk[-1][0]
+                self.save_checkpoint(checkpoint, done)
+                totals['posts'] += posts
+                totals['comments'] += comments
+                totals['skipped'] += skipped
+                self.stdout.write(
+                    f'Запись {done}: постов {totals["posts"]}, '
+                    f'комментариев {totals["comments"]}, '
+                    f'пропущено {totals["skipped"]}'
+                )
+        self.stdout.write(self.style.SUCCESS(
+            f'Импортировано постов: {totals["posts"]}, '
+            f'комментариев: {totals["comments"]}'
+        ))
+        if self.images:
+            self.stdout.write(
+                'Миниатюры новых картинок строит generate_thumbnails'
+            )
+
+    def read(self, source, file_format, skip):
+        """Записи файла по одной, пропуская уже импортированные."""
+        rows = csv.DictReader(source) if file_format == 'csv' else source
+        for number, row in enumerate(rows, 1):
+            if number <= skip:
+                continue
+            if file_format == 'jsonl':
+                if not row.strip():
+                    continue
+                try:
+                    row = json.loads(row)
+                except ValueError:
+                    row = None
+            yield number, row
+
+    def save_checkpoint(self, checkpoint, done):
+        temporary = f'{checkpoint}.tmp'
+        with open(temporary, 'w') as file:
+            file.write(str(done))
+        os.replace(temporary, checkpoint)
+
+    def build(self, record):
+        """Пост и его комментарии из записи; Skip, если она негодна."""
+        if not isinstance(record, dict):
+            raise Skip('это не JSON-объект')
+        author_id = self.users.get(record.get('author'))
+        if author_id is None:
+            raise Skip(f'неизвестный автор {record.get("author")!r}')
+        if not record.get('text'):
+            raise Skip('пустой текст')
+        group_id = None
+        if record.get('group'):
+            group_id = self.groups.get(record['group'])
+            if group_id is None:
+                raise Skip(f'неизвестная группа {record["group"]!r}')
+        post = Post(
+            author_id=author_id,
+            group_id=group_id,
+            text=record['text'],
+            pub_date=parse_date(record.get('pub_date')),
+        )
+        post.source_image = record.get('image') or None
+        if post.source_image and not self.images:
+            raise Skip('картинка без --images')
+        comments = []
+        for item in record.get('comments') or ():
+            if not isinstance(item, dict):
+                raise Skip(f'негодный комментарий {item!r}')
+            commenter_id = self.users.get(item.get('author'))
+            if commenter_id is None or not item.get('text'):
+                raise Skip(f'негодный комментарий {item!r}')
+            comments.append(Comment(
+                author_id=commenter_id,
+                text=item['text'],
+                created=parse_date(item.get('created')),
+            ))
+        return post, comments
+
+    def resolve(self, chunk):
+        names = set()
+        slugs = set()
+        for _, record in chunk:
+            if not isinstance(record, dict):
+                continue
+            names.add(record.get('author'))
+            slugs.add(record.get('group'))
+            for item in record.get('comments') or ():
+                if isinstance(item, dict):
+                    names.add(item.get('author'))
+        names.discard(None)
+        slugs.discard(None)
+        self.users.resolve(names)
+        if self.create_users:
+            missing = {name for name in names if not self.users.get(name)}
+            User.objects.bulk_create(
+                (
+                    User(username=name, password=make_password(None))
+                    for name in missing
+                ),
+                ignore_conflicts=True
+            )
+            self.users.resolve(names)
+        self.groups.resolve(slugs)
+
+    def attach_image(self, post, saved):
+        path = os.path.realpath(os.path.join(self.images, post.source_image))
+        if not path.startswith(self.images + os.sep):
+            raise Skip(f'картинка вне --images: {post.source_image!r}')
+        if not os.path.isfile(path):
+            raise Skip(f'нет файла {post.source_image!r}')
+        field = Post._meta.get_field('image')
+        with open(path, 'rb') as file:
+            name = field.storage.save(
+                field.generate_filename(post, os.path.basename(path)),
+                File(file)
+            )
+        saved.append(name)
+        post.image = name
+
+    def import_chunk(self, chunk):
+        self.resolve(chunk)
+        built = []
+        skipped = 0
+        saved = []
+        try:
+            for number, record in chunk:
+                try:
+                    post, comments = self.build(record)
+                    if post.source_image:
+                        self.attach_image(post, saved)
+                except Skip as reason:
+                    skipped += 1
+                    self.stderr.write(f'Запись {number} пропущена: {reason}')
+                    continue
+                built.append((post, comments))
+            with transaction.atomic():
+                posts, comments = self.insert(built)
+        except BaseException:
+            field = Post._meta.get_field('image')
+            for name in saved:
+                field.storage.delete(name)
+            raise
+        self.purge(posts, comments)
+        return len(posts), len(comments), skipped
+
+    def insert(self, built):
+        """Вставляет пачку и обновляет то, что обычно делают сигналы."""
+        posts = [post for post, _ in built]
+        assign_ids(Post, posts)
+        dated = [post for post in posts if post.pub_date]
+        for post in dated:
+            post.imported_date = post.pub_date
+        Post.objects.bulk_create(posts)
+        # auto_now_add перезаписывает дату при вставке: возвращаем ее.
+        for post in dated:
+            post.pub_date = post.imported_date
+        Post.objects.bulk_update(dated, ['pub_date'])
+        comments = []
+        for post, post_comments in built:
+            for comment in post_comments:
+                comment.post_id = post.id
+                comment.imported_date = comment.created
+                comments.append(comment)
+        assign_ids(Comment, comments)
+        Comment.objects.bulk_create(comments)
+        dated = [comment for comment in comments if comment.imported_date]
+        for comment in dated:
+            comment.created = comment.imported_date
+        Comment.objects.bulk_update(dated, ['created'])
+        feed.fan_out_many(posts)
+        stats.reconcile(list(
+            {post.author_id for post in posts}
+            | {comment.author_id for comment in comments}
+        ))
+        return posts, comments
+
+    def purge(self, posts, comments):
+        bump_generation()
+        purge_paths(
+            reverse('posts:index'),
+            *(
+                reverse('posts:profile', args=(username,))
+                for username in User.objects.filter(
+                    id__in={post.author_id for post in posts}
+                    | {comment.author_id for comment in comments}
+                ).values_list('username', flat=True)
+            ),
+            *(
+                group_path(slug)
+                for slug in Group.objects.filter(
+                    id__in={post.group_id for post in posts}
+                ).values_list('slug', flat=True)
+            ),
+        )
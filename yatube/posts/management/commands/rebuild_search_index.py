@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from posts import search
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает полнотекстовый индекс постов'
+
+    def handle(self, *args, **options):
+        if not search.is_supported():
+            self.stdout.write('Индекс поддерживается только для SQLite')
+            return
+        search.rebuild()
+        self.stdout.write(self.style.SUCCESS('Индекс пересобран'))
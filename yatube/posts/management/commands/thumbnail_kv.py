@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from sorl.thumbnail import default
+
+
+class Command(BaseCommand):
+    help = (
+        'Чистит хранилище метаданных миниатюр sorl, оставшихся от '
+        'прежних шаблонов: страницы берут картинки из вариантов поста'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'action',
+            choices=('evict', 'stats'),
+            help='evict — убрать записи об удаленных файлах, '
+                 'stats — показать число записей'
+        )
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Для evict: очистить хранилище целиком'
+        )
+
+    def evict(self, everything):
+        before = default.kvstore.count()
+        if everything:
+            default.kvstore.clear()
+        else:
+            default.kvstore.cleanup()
+        return f'Удалено записей: {before - default.kvstore.count()}'
+
+    def handle(self, *args, **options):
+        if options['action'] == 'evict':
+            message = self.evict(options['all'])
+        else:
+            message = f'Записей в хранилище: {default.kvstore.count()}'
+        self.stdout.write(self.style.SUCCESS(message))
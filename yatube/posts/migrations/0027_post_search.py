@@ -0,0 +1,50 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:20
+
+from django.db import migrations
+
+FTS_TABLE = 'posts_post_fts'
+FORWARD = (
+    f'CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5('
+    "text, content='posts_post', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    f'CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON posts_post BEGIN '
+    f'INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text); '
+    'END',
+    f'CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON posts_post BEGIN '
+    f'INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) '
+    "VALUES ('delete', old.id, old.text); "
+    'END',
+    f'CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE OF text ON posts_post '
+    'BEGIN '
+    f'INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) '
+    "VALUES ('delete', old.id, old.text); "
+    f'INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text); '
+    'END',
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+)
+BACKWARD = (
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ai',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ad',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_au',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+)
+
+
+def run(statements):
+    def operation(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0026_authorstats'),
+    ]
+
+    operations = [
+        migrations.RunPython(run(FORWARD), run(BACKWARD)),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:21
+
+from django.db import migrations, models
+
+
+def mark_existing_ready(apps, schema_editor):
+    # Старые посты и раньше получали миниатюры при показе.
+    apps.get_model('posts', 'Post').objects.update(thumbnails_ready=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0027_post_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='thumbnails_ready',
+            field=models.BooleanField(default=False, verbose_name='Миниатюры готовы'),
+        ),
+        migrations.RunPython(mark_existing_ready, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:22
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0028_post_thumbnails_ready'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostImageRendition',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('width', models.PositiveIntegerField(verbose_name='Ширина')),
+                ('height', models.PositiveIntegerField(verbose_name='Высота')),
+                ('format', models.CharField(max_length=10, verbose_name='Формат')),
+                ('file', models.FileField(max_length=255, upload_to='renditions/', verbose_name='Файл')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='renditions', to='posts.Post', verbose_name='Пост')),
+            ],
+            options={
+                'verbose_name': 'Вариант картинки',
+                'verbose_name_plural': 'Варианты картинок',
+                'ordering': ('width',),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='postimagerendition',
+            constraint=models.UniqueConstraint(fields=('post', 'width', 'format'), name='unique_rendition'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 2.2.16 on 2026-10-18 05:02
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+def fill_updated(apps, schema_editor):
+    # Правки раньше не отмечались, поэтому считаем от даты публикации.
+    apps.get_model('posts', 'Post').objects.update(
+        updated=models.F('pub_date')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0029_postimagerendition'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='updated',
+            field=models.DateTimeField(auto_now=True, db_index=True, default=django.utils.timezone.now, verbose_name='Дата изменения'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fill_updated, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+from django.conf import settings
+from django.db import migrations
+from django.db.models import Count
+
+COUNTERS = {
+    'posts_count': ('Post', 'author_id'),
+    'followers_count': ('Follow', 'author_id'),
+    'following_count': ('Follow', 'user_id'),
+    'comments_count': ('Comment', 'author_id'),
+}
+
+
+def fill_stats(apps, schema_editor):
+    """Строки счетчиков для всех пользователей: страницы их только
+    читают."""
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    AuthorStats = apps.get_model('posts', 'AuthorStats')
+    user_ids = list(
+        User.objects.filter(stats__isnull=True).values_list('id', flat=True)
+    )
+    for start in range(0, len(user_ids), 1000):
+        batch = user_ids[start:start + 1000]
+        counts = {
+            user_id: dict.fromkeys(COUNTERS, 0) for user_id in batch
+        }
+        for counter, (model, field) in COUNTERS.items():
+            for user_id, total in apps.get_model('posts', model).objects.filter(
+                **{f'{field}__in': batch}
+            ).order_by().values_list(field).annotate(Count('pk')):
+                counts[user_id][counter] = total
+        AuthorStats.objects.bulk_create(
+            AuthorStats(user_id=user_id, **counts[user_id])
+            for user_id in batch
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0031_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_stats, migrations.RunPython.noop),
+    ]
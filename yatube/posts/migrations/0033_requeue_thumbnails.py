@@ -0,0 +1,23 @@
+from django.db import migrations
+
+
+def requeue_without_renditions(apps, schema_editor):
+    """Старым постам шаблон показывал миниатюру sorl, а теперь берет
+    варианты картинки. Пока их нет, отдается оригинал, поэтому такие
+    посты снова ждут generate_thumbnails."""
+    apps.get_model('posts', 'Post').objects.exclude(image='').filter(
+        renditions__isnull=True
+    ).update(thumbnails_ready=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0032_fill_author_stats'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            requeue_without_renditions, migrations.RunPython.noop
+        ),
+    ]
@@ -30,10 +30,18 @@ class Post(models.Model):
         db_index=True,
         verbose_name='Дата публикации'
     )
+    updated = models.DateTimeField(
+        auto_now=True,
+        db_index=True,
+        verbose_name='Дата изменения'
+    )
+    # Отдельные индексы внешних ключей не нужны: эти поля первыми
+    # входят в составные индексы из Meta.
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
         related_name='posts',
+        db_index=False,
         verbose_name='Автор'
     )
     group = models.ForeignKey(
@@ -42,6 +50,7 @@ class Post(models.Model):
         null=True,
         on_delete=models.SET_NULL,
         related_name='posts',
+        db_index=False,
         verbose_name='Группа'
     )
     image = models.ImageField(
@@ -49,9 +58,21 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    thumbnails_ready = models.BooleanField(
+        default=False,
+        verbose_name='Миниатюры готовы'
+    )
 
     class Meta:
         ordering = ('-pub_date',)
+        # Ленты автора и группы листаются по (pub_date, id) от новых.
+        indexes = [
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_pub_date_idx'),
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_pub_date_idx')]
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
 
@@ -64,6 +85,7 @@ class Comment(models.Model):
         Post,
         on_delete=models.CASCADE,
         related_name='comments',
+        db_index=False,
         verbose_name='Пост'
     )
     author = models.ForeignKey(
@@ -80,6 +102,10 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ('-created',)
+        indexes = [
+            models.Index(
+                fields=['post', '-created', '-id'],
+                name='comment_post_created_idx')]
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
 
@@ -98,6 +124,7 @@ class Follow(models.Model):
         User,
         on_delete=models.CASCADE,
         related_name='following',
+        db_index=False,
         verbose_name='Автор'
     )
 
@@ -106,6 +133,11 @@ class Follow(models.Model):
             models.UniqueConstraint(
                 fields=['user', 'author'],
                 name="unique_follow")]
+        # Уникальность покрывает поиск по подписчику, этот - по автору.
+        indexes = [
+            models.Index(
+                fields=['author', 'user'],
+                name='follow_author_user_idx')]
         verbose_name = 'Подписку'
         verbose_name_plural = 'Подписки'
 
@@ -114,3 +146,91 @@ class Follow(models.Model):
             user=self.user.username,
             author=self.author.username
         )
+
+
+class FeedEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed',
+        verbose_name='Подписчик'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Пост'
+    )
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
+
+    class Meta:
+        ordering = ('-pub_date', '-post')
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'],
+                name='unique_feed_entry')]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='feed_user_pub_date_idx')]
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+
+
+class AuthorStats(models.Model):
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Автор'
+    )
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Постов'
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Подписчиков'
+    )
+    following_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Подписок'
+    )
+    comments_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Комментариев'
+    )
+
+    class Meta:
+        verbose_name = 'Статистика автора'
+        verbose_name_plural = 'Статистика авторов'
+
+
+class PostImageRendition(models.Model):
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='renditions',
+        verbose_name='Пост'
+    )
+    width = models.PositiveIntegerField(verbose_name='Ширина')
+    height = models.PositiveIntegerField(verbose_name='Высота')
+    format = models.CharField(max_length=10, verbose_name='Формат')
+    file = models.FileField(
+        upload_to='renditions/',
+        max_length=255,
+        verbose_name='Файл'
+    )
+
+    class Meta:
+        ordering = ('width',)
+        constraints = [
+            models.UniqueConstraint(
+                fields=['post', 'width', 'format'],
+                name='unique_rendition')]
+        verbose_name = 'Вариант картинки'
+        verbose_name_plural = 'Варианты картинок'
+
+    def __str__(self):
+        return f'{self.post_id}: {self.width}w {self.format}'
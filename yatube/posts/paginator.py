@@ -0,0 +1,179 @@
+import base64
+import binascii
+import hashlib
+
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+CURSOR_SEPARATOR = '|'
+APPROXIMATE_COUNT_KEY = 'approximate_count:{}'
+APPROXIMATE_COUNT_TIMEOUT = 60 * 5
+
+
+def encode_cursor(value, pk):
+    raw = f'{value.isoformat()}{CURSOR_SEPARATOR}{pk}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Возвращает пару (дата, id) из курсора или None для мусора."""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        value, pk = raw.decode().split(CURSOR_SEPARATOR)
+        value = parse_datetime(value)
+        pk = int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        return None
+    if value is None:
+        return None
+    return value, pk
+
+
+class CursorPage:
+    """Страница, которая выбирает записи при первом обращении.
+
+    Поэтому закэшированный фрагмент шаблона не тратит запросов на посты.
+    """
+    is_cursor = True
+
+    def __init__(self, paginator, after=None, before=None):
+        self.paginator = paginator
+        self._after = after
+        self._before = before
+        self._object_list = None
+
+    def _load(self):
+        if self._object_list is None:
+            self._object_list, self._has_next, self._has_previous = (
+                self.paginator.fetch(self._after, self._before)
+            )
+            self._bounds = None
+            if self._object_list:
+                self._bounds = (
+                    self.paginator.key_values(self._object_list[0]),
+                    self.paginator.key_values(self._object_list[-1]),
+                )
+
+    @property
+    def object_list(self):
+        self._load()
+        return self._object_list
+
+    @object_list.setter
+    def object_list(self, value):
+        self._load()
+        self._object_list = value
+
+    def __repr__(self):
+        return f'<CursorPage of {len(self)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def has_next(self):
+        self._load()
+        return self._has_next
+
+    def has_previous(self):
+        self._load()
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    @property
+    def next_cursor(self):
+        if self.has_next() and self._bounds:
+            return encode_cursor(*self._bounds[1])
+        return None
+
+    @property
+    def previous_cursor(self):
+        if self.has_previous() and self._bounds:
+            return encode_cursor(*self._bounds[0])
+        return None
+
+    @property
+    def approximate_count(self):
+        return self.paginator.approximate_count
+
+
+class CursorPaginator:
+    """Постраничный вывод по ключу (дата, id) без COUNT и OFFSET.
+
+    Страница выбирается условием по индексированной дате с id в качестве
+    уточнения порядка, поэтому стоимость не зависит от глубины листания.
+    """
+
+    def __init__(self, queryset, per_page, keys=('pub_date', 'id')):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.keys = keys
+
+    def key_values(self, obj):
+        return tuple(getattr(obj, key) for key in self.keys)
+
+    def _after(self, value, pk):
+        date_key, id_key = self.keys
+        return self.queryset.filter(
+            Q(**{f'{date_key}__lt': value})
+            | Q(**{date_key: value, f'{id_key}__lt': pk})
+        ).order_by(f'-{date_key}', f'-{id_key}')
+
+    def _before(self, value, pk):
+        date_key, id_key = self.keys
+        return self.queryset.filter(
+            Q(**{f'{date_key}__gt': value})
+            | Q(**{date_key: value, f'{id_key}__gt': pk})
+        ).order_by(date_key, id_key)
+
+    def fetch(self, after=None, before=None):
+        """Возвращает записи страницы и признаки соседних страниц."""
+        if before is not None:
+            items = list(self._before(*before)[:self.per_page + 1])
+            return (
+                items[:self.per_page][::-1],
+                True,
+                len(items) > self.per_page,
+            )
+        if after is not None:
+            queryset = self._after(*after)
+        else:
+            date_key, id_key = self.keys
+            queryset = self.queryset.order_by(f'-{date_key}', f'-{id_key}')
+        items = list(queryset[:self.per_page + 1])
+        return (
+            items[:self.per_page],
+            len(items) > self.per_page,
+            after is not None,
+        )
+
+    def page(self, after=None, before=None):
+        return CursorPage(self, after, before)
+
+    def get_page(self, after=None, before=None):
+        """Как Paginator.get_page: битый курсор ведет на первую страницу."""
+        return self.page(
+            after=decode_cursor(after),
+            before=decode_cursor(before),
+        )
+
+    @cached_property
+    def approximate_count(self):
+        """Число записей, посчитанное не чаще раза в несколько минут."""
+        key = APPROXIMATE_COUNT_KEY.format(
+            hashlib.md5(str(self.queryset.query).encode()).hexdigest()
+        )
+        return cache.get_or_set(
+            key, self.queryset.count, APPROXIMATE_COUNT_TIMEOUT
+        )
@@ -0,0 +1,175 @@
+from django.core.paginator import Paginator
+from django.db.models import Count, Max
+from django.shortcuts import get_object_or_404
+
+from .cache import get_generation
+from .models import Follow, Group, Post, User
+from .paginator import CursorPaginator
+from .stats import get_stats
+
+POSTS_PER_PAGE = 10
+COMMENTS_PER_PAGE = 20
+FEED_KEYS = ('pub_date', 'post_id')
+SELECTED = ('author', 'group')
+PREFETCHED = ('renditions',)
+
+
+def with_related(posts, fields=None, prefix=''):
+    """Присоединяет автора и группу и подгружает варианты картинки.
+
+    С fields - только то, что из этого нужно.
+    """
+    selected = [
+        prefix + name for name in SELECTED
+        if fields is None or name in fields
+    ]
+    prefetched = [
+        prefix + name for name in PREFETCHED
+        if fields is None or name in fields
+    ]
+    if selected:
+        posts = posts.select_related(*selected)
+    return posts.prefetch_related(*prefetched)
+
+
+def cursor_page(queryset, request, keys=('pub_date', 'id'),
+                per_page=POSTS_PER_PAGE):
+    return CursorPaginator(queryset, per_page, keys).get_page(
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
+
+
+def page_obj(object, request, keys=('pub_date', 'id')):
+    if 'page' in request.GET:
+        return Paginator(object, POSTS_PER_PAGE).get_page(
+            request.GET.get('page')
+        )
+    return cursor_page(object, request, keys)
+
+
+def post_list(fields=None):
+    return with_related(Post.objects.all(), fields)
+
+
+def group_post_list(group, fields=None):
+    return with_related(group.posts.all(), fields)
+
+
+def author_post_list(author, fields=None):
+    return with_related(author.posts.all(), fields)
+
+
+def feed_page(user, request, paginate=page_obj, fields=None):
+    """Страница ленты подписок: записи ленты заменены их постами."""
+    page = paginate(
+        with_related(user.feed.all(), fields, prefix='post__').select_related(
+            'post'
+        ),
+        request,
+        keys=FEED_KEYS
+    )
+    page.object_list = [entry.post for entry in page.object_list]
+    return page
+
+
+def get_author(username):
+    """Автор со счетчиками, 404 для неизвестного имени."""
+    author = get_object_or_404(
+        User.objects.select_related('stats'), username=username
+    )
+    get_stats(author)
+    return author
+
+
+def get_post(post_id):
+    post = get_object_or_404(
+        Post.objects.select_related(
+            'author__stats', 'group'
+        ).prefetch_related('renditions'),
+        id=post_id
+    )
+    get_stats(post.author)
+    return post
+
+
+def is_following(user, author):
+    return (
+        user.is_authenticated
+        and user != author
+        and Follow.objects.filter(user=user, author=author).exists()
+    )
+
+
+def comment_list(post):
+    return post.comments.select_related('author')
+
+
+def comments_page(post, request, per_page=COMMENTS_PER_PAGE):
+    return cursor_page(
+        comment_list(post), request, keys=('created', 'id'),
+        per_page=per_page
+    )
+
+
+def index_state(request):
+    """Поколение меняется при правке любого поста или группы."""
+    return get_generation()
+
+
+def group_state(request, slug):
+    """Одним запросом: описание группы, дата последней правки и число
+    постов - оно меняется и при удалении."""
+    row = Group.objects.filter(slug=slug).annotate(
+        last_post=Max('posts__updated'), posts_count=Count('posts')
+    ).values_list(
+        'title', 'description', 'last_post', 'posts_count'
+    ).first()
+    return row
+
+
+def profile_state(request, username):
+    """Дата последней правки постов и счетчики автора."""
+    row = User.objects.filter(username=username).annotate(
+        last_post=Max('posts__updated')
+    ).values_list(
+        'last_post',
+        'stats__posts_count',
+        'stats__followers_count',
+        'stats__following_count',
+        'stats__comments_count',
+    ).first()
+    return row
+
+
+def post_state(request, post_id):
+    row = Post.objects.filter(id=post_id).annotate(
+        last_comment=Max('comments__created'),
+        comments_count=Count('comments'),
+    ).values_list(
+        'updated',
+        'last_comment',
+        'comments_count',
+        'thumbnails_ready',
+        'author__stats__posts_count',
+    ).first()
+    return row
+
+
+def feed_state(request):
+    """Лента меняется с подпиской, отпиской и правкой ее постов."""
+    if not request.user.is_authenticated:
+        return None
+    row = request.user.feed.aggregate(
+        last_post=Max('post__updated'), entries=Count('id')
+    )
+    return tuple(row.values())
+
+
+def follows_state(request):
+    if not request.user.is_authenticated:
+        return None
+    row = request.user.follower.aggregate(
+        last_follow=Max('id'), follows=Count('id')
+    )
+    return tuple(row.values())
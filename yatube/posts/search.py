@@ -0,0 +1,78 @@
+import re
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+FTS_TABLE = 'posts_post_fts'
+CREATE_TABLE = (
+    f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5('
+    "text, content='posts_post', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')"
+)
+TRIGGERS = (
+    f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai '
+    'AFTER INSERT ON posts_post BEGIN '
+    f'INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text); '
+    'END',
+    f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad '
+    'AFTER DELETE ON posts_post BEGIN '
+    f'INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) '
+    "VALUES ('delete', old.id, old.text); "
+    'END',
+    f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au '
+    'AFTER UPDATE OF text ON posts_post BEGIN '
+    f'INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) '
+    "VALUES ('delete', old.id, old.text); "
+    f'INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text); '
+    'END',
+)
+REBUILD = f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+
+
+def is_supported(using=DEFAULT_DB_ALIAS):
+    return connections[using].vendor == 'sqlite'
+
+
+def install(using=DEFAULT_DB_ALIAS):
+    """Создает индекс и триггеры, если их нет.
+
+    SQLite пересоздает таблицу постов при части миграций и теряет
+    триггеры, поэтому установка повторяется после каждого migrate.
+    """
+    if not is_supported(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(CREATE_TABLE)
+        for trigger in TRIGGERS:
+            cursor.execute(trigger)
+
+
+def rebuild(using=DEFAULT_DB_ALIAS):
+    if not is_supported(using):
+        return
+    install(using)
+    with connections[using].cursor() as cursor:
+        cursor.execute(REBUILD)
+
+
+def match_expression(text):
+    """Запрос пользователя как набор слов-префиксов без операторов FTS5."""
+    return ' '.join(f'"{word}"*' for word in re.findall(r'\w+', text))
+
+
+def search_posts(queryset, text):
+    """Посты, подходящие под запрос, от самых релевантных."""
+    expression = match_expression(text)
+    if not expression:
+        return queryset.none()
+    if not is_supported(queryset.db):
+        return queryset.filter(text__icontains=text)
+    return queryset.extra(
+        tables=[FTS_TABLE],
+        where=[
+            f'{FTS_TABLE}.rowid = posts_post.id',
+            f'{FTS_TABLE} MATCH %s',
+        ],
+        params=[expression],
+        select={'rank': f'{FTS_TABLE}.rank'},
+        order_by=['rank', '-pub_date'],
+    )
@@ -0,0 +1,102 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.urls import reverse
+
+from . import feed, stats, thumbnails
+from .cache import bump_generation, group_path, purge_paths, purge_post
+from .models import Comment, Follow, Group, Post, User
+
+
+def profile_path(user):
+    return reverse('posts:profile', args=(user.username,))
+
+
+def purge_comment(comment):
+    purge_paths(
+        reverse('posts:post_detail', args=(comment.post_id,)),
+        reverse('posts:post_comments', args=(comment.post_id,)),
+        profile_path(comment.author)
+    )
+
+
+def purge_follow(follow):
+    purge_paths(profile_path(follow.user), profile_path(follow.author))
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, **kwargs):
+    if created:
+        stats.create(instance)
+
+
+@receiver(pre_save, sender=Post)
+def post_saving(sender, instance, **kwargs):
+    instance._previous_group_ids = ()
+    previous = None
+    if instance.pk:
+        previous = Post.objects.filter(
+            pk=instance.pk
+        ).values_list('group_id', 'image').first()
+    if previous is not None:
+        instance._previous_group_ids = (previous[0],)
+    # Картинку могли сменить где угодно: в форме, админке, API.
+    if (previous[1] if previous else '') != (instance.image.name or ''):
+        instance.thumbnails_ready = False
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    bump_generation()
+    purge_post(instance, getattr(instance, '_previous_group_ids', ()))
+    if created:
+        feed.fan_out(instance)
+        stats.bump(instance.author_id, 'posts_count', 1)
+    if instance.image and not instance.thumbnails_ready:
+        thumbnails.queue(instance)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    bump_generation()
+    purge_post(instance)
+    stats.bump(instance.author_id, 'posts_count', -1)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    bump_generation()
+    purge_paths(
+        reverse('posts:index'),
+        group_path(instance.slug)
+    )
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    if created:
+        stats.bump(instance.author_id, 'comments_count', 1)
+    purge_comment(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    stats.bump(instance.author_id, 'comments_count', -1)
+    purge_comment(instance)
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, **kwargs):
+    if created:
+        feed.backfill(instance.user_id, instance.author_id)
+        stats.bump(instance.author_id, 'followers_count', 1)
+        stats.bump(instance.user_id, 'following_count', 1)
+        purge_follow(instance)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    feed.prune(instance.user_id, instance.author_id)
+    stats.bump(instance.author_id, 'followers_count', -1)
+    stats.bump(instance.user_id, 'following_count', -1)
+    purge_follow(instance)
@@ -0,0 +1,74 @@
+from django.db.models import Count, F
+
+from .models import AuthorStats, Comment, Follow, Post, User
+
+BATCH_SIZE = 1000
+COUNTERS = {
+    'posts_count': (Post, 'author_id'),
+    'followers_count': (Follow, 'author_id'),
+    'following_count': (Follow, 'user_id'),
+    'comments_count': (Comment, 'author_id'),
+}
+
+
+def _count(user_ids):
+    """Считает все счетчики для пачки пользователей группировкой."""
+    counts = {user_id: dict.fromkeys(COUNTERS, 0) for user_id in user_ids}
+    for counter, (model, field) in COUNTERS.items():
+        for user_id, total in model.objects.filter(
+            **{f'{field}__in': user_ids}
+        ).order_by().values_list(field).annotate(Count('pk')):
+            counts[user_id][counter] = total
+    return counts
+
+
+def get_stats(user):
+    """Счетчики автора без записи в базу.
+
+    Строка создается вместе с пользователем (и миграцией для прежних);
+    если ее все же нет, страница показывает нули, а не пишет на чтении.
+    """
+    try:
+        stats = user.stats
+    except AuthorStats.DoesNotExist:
+        stats = AuthorStats(user=user)
+        user.stats = stats
+    stats.user = user
+    return stats
+
+
+def create(user):
+    AuthorStats.objects.get_or_create(user=user)
+
+
+def bump(user_id, counter, delta):
+    """Сдвигает счетчик, строк не создает.
+
+    Строки нет у удаляемого пользователя (каскад убирает ее раньше его
+    постов) и у созданного в обход сигналов: такого досчитывает
+    reconcile_stats.
+    """
+    AuthorStats.objects.filter(user_id=user_id).update(
+        **{counter: F(counter) + delta}
+    )
+
+
+def reconcile(user_ids):
+    for start in range(0, len(user_ids), BATCH_SIZE):
+        batch = user_ids[start:start + BATCH_SIZE]
+        counts = _count(batch)
+        existing = AuthorStats.objects.in_bulk(batch)
+        users = set(
+            User.objects.filter(pk__in=batch).values_list('pk', flat=True)
+        )
+        for stats in existing.values():
+            for counter, value in counts[stats.pk].items():
+                setattr(stats, counter, value)
+        AuthorStats.objects.bulk_update(
+            existing.values(), list(COUNTERS)
+        )
+        AuthorStats.objects.bulk_create(
+            AuthorStats(user_id=user_id, **counts[user_id])
+            for user_id in batch
+            if user_id in users and user_id not in existing
+        )
@@ -0,0 +1,27 @@
+from django import template
+
+from ..thumbnails import WEBP
+
+register = template.Library()
+
+
+@register.filter
+def srcset(renditions, image_format):
+    """srcset из сохраненных вариантов: 'webp' или исходный формат."""
+    webp = image_format == WEBP
+    return ', '.join(
+        f'{rendition.file.url} {rendition.width}w'
+        for rendition in renditions
+        if (rendition.format == WEBP) == webp
+    )
+
+
+@register.filter
+def largest(renditions):
+    """URL самого широкого варианта в исходном формате - для src."""
+    originals = [
+        rendition for rendition in renditions if rendition.format != WEBP
+    ]
+    if not originals:
+        return ''
+    return max(originals, key=lambda rendition: rendition.width).file.url
@@ -0,0 +1,26 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin:
+    """Проверка, что страница укладывается в заданное число запросов.
+
+    Страница открывается дважды: после первого показа кэш очищается и
+    считаются запросы второго, поэтому бюджет не зависит от того,
+    открывали ли ее раньше в тесте. На чтении страницы ничего не
+    создается: счетчики автора появляются вместе с пользователем.
+    """
+
+    def assertQueryBudget(self, client, url, budget):
+        client.get(url)
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        queries = '\n'.join(query['sql'] for query in context.captured_queries)
+        self.assertLessEqual(
+            len(context),
+            budget,
+            f'{url}: {len(context)} запросов вместо {budget}:\n{queries}'
+        )
+        return response
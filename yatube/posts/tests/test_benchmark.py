@@ -0,0 +1,85 @@
+from contextlib import ExitStack
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+
+from ..benchmark import build_dataset, compare, targets
+from ..management.commands.benchmark_views import Command
+from ..models import Comment, Follow, Post
+
+DATASET = dict(users=8, groups=2, posts=40, comments=60, follows=15, seed=7)
+
+
+def fingerprint():
+    return (
+        list(Post.objects.order_by('pub_date', 'text').values_list(
+            'author__username', 'group__slug', 'text', 'pub_date'
+        )),
+        list(Comment.objects.order_by('created', 'text').values_list(
+            'post__text', 'author__username', 'created'
+        )),
+        sorted(Follow.objects.values_list(
+            'user__username', 'author__username'
+        )),
+    )
+
+
+class BenchmarkDatasetTests(TestCase):
+    def test_same_seed_same_data(self):
+        savepoint = transaction.savepoint()
+        build_dataset(**DATASET)
+        first = fingerprint()
+        transaction.savepoint_rollback(savepoint)
+        build_dataset(**DATASET)
+        self.assertEqual(fingerprint(), first)
+        self.assertEqual(len(first[0]), DATASET['posts'])
+        self.assertEqual(len(first[2]), DATASET['follows'])
+        self.assertTrue(targets()['reader'].feed.exists())
+
+    def test_compare_reports_regressions(self):
+        baseline = {'views': {'index': {
+            'p50_ms': 10, 'p95_ms': 20, 'p99_ms': 30, 'mean_ms': 12,
+            'queries': 5, 'peak_kib': 300,
+        }}}
+        results = {'views': {'index': {
+            'p50_ms': 11, 'p95_ms': 23, 'p99_ms': 40, 'mean_ms': 13,
+            'queries': 6, 'peak_kib': 310,
+        }}}
+        _, regressions = compare(results, baseline, tolerance=0.2)
+        self.assertEqual(regressions, ['index queries +20%'])
+        _, regressions = compare(results, baseline, tolerance=0.1)
+        self.assertEqual(
+            regressions, ['index p95_ms +15%', 'index queries +20%']
+        )
+
+    def test_repeat_needs_two_measurements(self):
+        with self.assertRaisesMessage(CommandError, 'два замера'):
+            call_command('benchmark_views', repeat=1, stdout=StringIO())
+
+    @override_settings(DATABASE_REPLICAS=['replica1'])
+    def test_reads_go_to_benchmark_database(self):
+        """Замеры не читают реплики с рабочими данными."""
+        replicas = []
+
+        def measure_all(command, options):
+            replicas.append(settings.DATABASE_REPLICAS)
+            return {}
+        module = 'posts.management.commands.benchmark_views'
+        with ExitStack() as stack:
+            # Временная база и тестовое окружение уже есть у самого теста.
+            for name in ('build_dataset', 'setup_test_environment',
+                         'teardown_test_environment'):
+                stack.enter_context(mock.patch(f'{module}.{name}'))
+            for name in ('create_test_db', 'destroy_test_db'):
+                stack.enter_context(
+                    mock.patch.object(connection.creation, name)
+                )
+            stack.enter_context(
+                mock.patch.object(Command, 'measure_all', measure_all)
+            )
+            call_command('benchmark_views', stdout=StringIO())
+        self.assertEqual(replicas, [[]])
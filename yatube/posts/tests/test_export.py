@@ -0,0 +1,78 @@
+import json
+import shutil
+import tempfile
+import zipfile
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Comment, Post, User
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+EXPORT = reverse('posts:profile_export', args=('danil',))
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ExportTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='danil')
+        cls.reader = User.objects.create(username='reader')
+        cls.post = Post.objects.create(
+            author=cls.author,
+            text='Пост с картинкой',
+            image=SimpleUploadedFile('small.gif', SMALL_GIF),
+        )
+        Comment.objects.create(
+            post=cls.post, author=cls.author, text='Свой комментарий'
+        )
+        cls.client_author = Client()
+        cls.client_author.force_login(cls.author)
+        cls.client_reader = Client()
+        cls.client_reader.force_login(cls.reader)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_ndjson(self):
+        response = self.client_author.get(EXPORT)
+        self.assertTrue(response.streaming)
+        lines = [
+            json.loads(line)
+            for line in b''.join(response.streaming_content).splitlines()
+        ]
+        self.assertEqual(
+            [line['type'] for line in lines], ['author', 'post', 'comment']
+        )
+        self.assertEqual(lines[1]['text'], 'Пост с картинкой')
+        self.assertEqual(lines[2]['post'], self.post.id)
+
+    def test_zip_with_images(self):
+        response = self.client_author.get(EXPORT, {'format': 'zip'})
+        archive = zipfile.ZipFile(
+            BytesIO(b''.join(response.streaming_content))
+        )
+        self.assertEqual(archive.testzip(), None)
+        self.assertEqual(
+            archive.read('images/' + self.post.image.name), SMALL_GIF
+        )
+        self.assertEqual(
+            len(archive.read('content.ndjson').splitlines()), 3
+        )
+
+    def test_only_author_may_export(self):
+        self.assertEqual(self.client_reader.get(EXPORT).status_code, 403)
@@ -0,0 +1,70 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Group, Post, User
+
+SLUG = 'feeds'
+USERNAME = 'reporter'
+FEEDS = [
+    reverse('posts:posts_rss'),
+    reverse('posts:posts_atom'),
+    reverse('posts:group_rss', args=(SLUG,)),
+    reverse('posts:group_atom', args=(SLUG,)),
+    reverse('posts:author_rss', args=(USERNAME,)),
+    reverse('posts:author_atom', args=(USERNAME,)),
+]
+
+
+class FeedsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username=USERNAME)
+        cls.group = Group.objects.create(
+            title='Ленты', slug=SLUG, description='Группа для лент'
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Первый пост в ленте'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest = Client()
+
+    def test_feeds_list_posts(self):
+        for url in FEEDS:
+            with self.subTest(url=url):
+                response = self.guest.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn('xml', response['Content-Type'])
+                self.assertIn(self.post.text, response.content.decode())
+                self.assertTrue(response.has_header('ETag'))
+
+    def test_unknown_group_and_author(self):
+        for url in (
+            reverse('posts:group_rss', args=('missing',)),
+            reverse('posts:author_atom', args=('missing',)),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.guest.get(url).status_code, 404)
+
+    def test_polling_is_cheap_and_new_post_invalidates(self):
+        """Повторный опрос отдается из кэша без запросов к базе, новый
+        пост сбрасывает ленты вместе с их страницами."""
+        etags = {url: self.guest.get(url)['ETag'] for url in FEEDS}
+        for url in FEEDS:
+            with self.subTest(url=url), self.assertNumQueries(0):
+                response = self.guest.get(
+                    url, HTTP_IF_NONE_MATCH=etags[url]
+                )
+                self.assertEqual(response.status_code, 304)
+        Post.objects.create(
+            author=self.author, group=self.group, text='Свежий пост'
+        )
+        for url in FEEDS:
+            with self.subTest(url=url):
+                response = self.guest.get(
+                    url, HTTP_IF_NONE_MATCH=etags[url]
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertIn('Свежий пост', response.content.decode())
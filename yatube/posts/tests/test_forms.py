@@ -2,12 +2,15 @@ import shutil
 import tempfile
 
 from http import HTTPStatus
+from io import BytesIO
 
 from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.template.defaultfilters import filesizeformat
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 from django import forms
+from PIL import Image
 
 from ..models import Comment, Group, Post, User
 
@@ -238,3 +241,75 @@ class PostFormTests(TestCase):
         self.assertEqual(comment.text, form_data['text'])
         self.assertEqual(comment.author, self.user)
         self.assertEqual(comment.post, self.post)
+
+    def upload_image(self, name, size, image_format, **save_options):
+        buffer = BytesIO()
+        Image.new('RGB', size, 'red').save(
+            buffer, image_format, **save_options
+        )
+        return self.authorized.post(
+            CREATE_POST,
+            data={
+                'text': 'Пост с картинкой',
+                'image': SimpleUploadedFile(name, buffer.getvalue()),
+            },
+        )
+
+    @override_settings(POST_IMAGE_MAX_BYTES=1024)
+    def test_reject_too_large_file(self):
+        posts = set(Post.objects.all())
+        response = self.upload_image('big.png', (300, 300), 'PNG',
+                                     compress_level=0)
+        self.assertFormError(
+            response, 'form', 'image', f'Файл больше {filesizeformat(1024)}.'
+        )
+        self.assertEqual(posts, set(Post.objects.all()))
+
+    @override_settings(POST_IMAGE_MAX_PIXELS=5 * 10 ** 5)
+    def test_reject_too_many_pixels_below_million(self):
+        response = self.upload_image('wide.png', (1000, 600), 'PNG')
+        self.assertFormError(
+            response, 'form', 'image', 'Картинка больше 0.5 Мпикс.'
+        )
+
+    def test_upload_view_checks_csrf(self):
+        """Ограничение загрузки не отключает проверку CSRF."""
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.user)
+        response = client.post(CREATE_POST, data={'text': 'Без токена'})
+        self.assertFalse(Post.objects.filter(text='Без токена').exists())
+        self.assertContains(response, 'CSRF')
+
+    @override_settings(POST_IMAGE_MAX_PIXELS=10 ** 6)
+    def test_reject_too_many_pixels(self):
+        response = self.upload_image('wide.png', (2000, 600), 'PNG')
+        self.assertFormError(
+            response, 'form', 'image', 'Картинка больше 1 Мпикс.'
+        )
+
+    @override_settings(POST_IMAGE_MAX_SIDE=100)
+    def test_strip_exif_and_downsample(self):
+        exif = Image.Exif()
+        exif[0x010F] = 'Камера'
+        posts = set(Post.objects.all())
+        self.upload_image('photo.jpg', (400, 200), 'JPEG', exif=exif)
+        post = (set(Post.objects.all()) - posts).pop()
+        with Image.open(post.image.path) as image:
+            self.assertEqual(image.size, (100, 50))
+            self.assertNotIn('exif', image.info)
+
+    @override_settings(POST_IMAGE_MAX_SIDE=100)
+    def test_strip_exif_and_downsample_mpo(self):
+        """Многокадровый JPEG с телефона обрабатывается как JPEG."""
+        exif = Image.Exif()
+        exif[0x010F] = 'Камера'
+        posts = set(Post.objects.all())
+        self.upload_image(
+            'photo.jpg', (400, 200), 'MPO', exif=exif, save_all=True,
+            append_images=[Image.new('RGB', (400, 200), 'blue')]
+        )
+        post = (set(Post.objects.all()) - posts).pop()
+        with Image.open(post.image.path) as image:
+            self.assertEqual(image.format, 'JPEG')
+            self.assertEqual(image.size, (100, 50))
+            self.assertNotIn('exif', image.info)
@@ -0,0 +1,161 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from sorl.thumbnail import default, get_thumbnail
+
+from .. import thumbnails
+from ..models import Post, User
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def thumbnail_files():
+    return [
+        name
+        for _, _, names in os.walk(os.path.join(TEMP_MEDIA_ROOT, 'cache'))
+        for name in names
+    ]
+
+
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT,
+    THUMBNAIL_KVSTORE_PATH=os.path.join(TEMP_MEDIA_ROOT, 'kv.sqlite3'),
+)
+class ThumbnailTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='danil')
+        cls.guest = Client()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def create_post(self, name='small.gif', content=SMALL_GIF):
+        return Post.objects.create(
+            author=self.user,
+            text='Пост с картинкой',
+            image=SimpleUploadedFile(name=name, content=content)
+        )
+
+    def test_original_until_thumbnails_ready(self):
+        """Пока миниатюры не готовы, показывается исходная картинка."""
+        post = self.create_post()
+        self.assertEqual(thumbnail_files(), [])
+        detail = reverse('posts:post_detail', args=(post.id,))
+        self.assertContains(
+            self.guest.get(detail), f'src="{post.image.url}"'
+        )
+        thumbnails.generate(post.id)
+        post.refresh_from_db()
+        self.assertTrue(post.thumbnails_ready)
+        # Миниатюры sorl больше не строятся: их не показывает ни один
+        # шаблон.
+        self.assertEqual(thumbnail_files(), [])
+        self.assertNotContains(
+            self.guest.get(detail), f'src="{post.image.url}"'
+        )
+
+    def test_any_save_with_new_image_queues_thumbnails(self):
+        """Миниатюры ставятся в очередь при сохранении поста откуда
+        угодно, а не только из формы."""
+        with mock.patch.object(thumbnails, 'queue') as queue:
+            post = self.create_post()
+            queue.assert_called_once_with(post)
+            Post.objects.filter(id=post.id).update(thumbnails_ready=True)
+            post.refresh_from_db()
+            queue.reset_mock()
+            post.text = 'Новый текст'
+            post.save()
+            queue.assert_not_called()
+            post.image = SimpleUploadedFile(name='new.gif', content=SMALL_GIF)
+            post.save()
+            queue.assert_called_once_with(post)
+        post.refresh_from_db()
+        self.assertFalse(post.thumbnails_ready)
+
+    def test_renditions_in_srcset(self):
+        """Варианты картинки хранятся в базе и попадают в srcset."""
+        buffer = BytesIO()
+        Image.new('RGB', (700, 350), 'red').save(buffer, 'JPEG')
+        post = self.create_post('big.jpg', buffer.getvalue())
+        thumbnails.generate(post.id)
+        self.assertEqual(
+            sorted(post.renditions.values_list('width', 'format')),
+            [
+                (320, 'jpeg'), (320, 'webp'),
+                (640, 'jpeg'), (640, 'webp'),
+                (700, 'jpeg'), (700, 'webp'),
+            ]
+        )
+        rendition = post.renditions.get(width=320, format='webp')
+        self.assertEqual(rendition.height, 160)
+        with Image.open(rendition.file.path) as image:
+            self.assertEqual((image.format, image.size), ('WEBP', (320, 160)))
+        response = self.guest.get(
+            reverse('posts:post_detail', args=(post.id,))
+        )
+        self.assertContains(response, f'{rendition.file.url} 320w')
+        self.assertContains(response, 'type="image/webp"')
+        largest = post.renditions.get(width=700, format='jpeg')
+        self.assertContains(response, f'src="{largest.file.url}"')
+        # Страница не обращается к sorl: ни ключей, ни миниатюр.
+        cache.clear()
+        with mock.patch.object(default.kvstore, 'get') as get:
+            response = self.guest.get(
+                reverse('posts:post_detail', args=(post.id,))
+            )
+        get.assert_not_called()
+        self.assertNotContains(response, f'{settings.MEDIA_URL}cache/')
+
+    def test_thumbnail_kvstore_evict(self):
+        """Записи о прежних миниатюрах sorl чистятся после удаления
+        файлов."""
+        post = self.create_post()
+        default.kvstore.clear()
+        get_thumbnail(post.image, '960x339', upscale=True)
+        self.assertGreater(default.kvstore.count(), 0)
+        post.image.delete(save=False)
+        call_command('thumbnail_kv', 'evict', stdout=StringIO())
+        self.assertEqual(default.kvstore.count(), 0)
+
+    def test_kvstore_batch_does_not_hold_write_lock(self):
+        """Пока копится пачка, другие процессы пишут в хранилище сразу,
+        а записи пачки видны внутри нее и попадают в файл в конце."""
+        default.kvstore.clear()
+        self.addCleanup(default.kvstore.clear)
+        other = sqlite3.connect(settings.THUMBNAIL_KVSTORE_PATH, timeout=0)
+        self.addCleanup(other.close)
+        with default.kvstore.batch():
+            default.kvstore._set_raw('sorl-thumbnail||image||batch', '1')
+            self.assertEqual(
+                default.kvstore._get_raw('sorl-thumbnail||image||batch'), '1'
+            )
+            with other:
+                other.execute(
+                    'INSERT INTO kvstore VALUES (?, ?)',
+                    ('sorl-thumbnail||image||other', '2')
+                )
+            self.assertEqual(default.kvstore.count(), 1)
+        self.assertEqual(default.kvstore.count(), 2)
@@ -0,0 +1,160 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from ..models import Comment, FeedEntry, Follow, Group, Post, User
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImportPostsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='danil')
+        cls.reader = User.objects.create(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug', description='Описание'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def write(self, name, lines):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write('\n'.join(lines) + '\n')
+        return path
+
+    def run_import(self, path, *args):
+        stderr = StringIO()
+        call_command(
+            'import_posts', path, *args, stdout=StringIO(), stderr=stderr
+        )
+        return stderr.getvalue()
+
+    def test_import_jsonl(self):
+        """Посты, комментарии, ленты и счетчики появляются пачками;
+        повторный запуск продолжает с места остановки."""
+        with open(os.path.join(self.directory, 'cat.gif'), 'wb') as file:
+            file.write(SMALL_GIF)
+        path = self.write('posts.jsonl', [
+            json.dumps({
+                'author': 'danil',
+                'group': 'test-slug',
+                'text': 'Старый пост',
+                'pub_date': '2015-05-01T10:00:00',
+                'image': 'cat.gif',
+                'comments': [{
+                    'author': 'reader',
+                    'text': 'Старый комментарий',
+                    'created': '2015-05-02T10:00:00',
+                }],
+            }),
+            json.dumps({'author': 'nobody', 'text': 'Чужой пост'}),
+            'не json',
+            json.dumps({'author': 'danil', 'text': 'Второй пост'}),
+        ])
+        errors = self.run_import(
+            path, '--batch-size', '2', '--images', self.directory
+        )
+        self.assertIn('Запись 2 пропущена', errors)
+        self.assertIn('Запись 3 пропущена', errors)
+        old = Post.objects.get(text='Старый пост')
+        self.assertEqual(old.pub_date.year, 2015)
+        self.assertEqual(old.group, self.group)
+        self.assertTrue(old.image.name.startswith('posts/cat'))
+        self.assertFalse(old.thumbnails_ready)
+        comment = Comment.objects.get(post=old)
+        self.assertEqual(comment.created.year, 2015)
+        self.assertEqual(
+            set(FeedEntry.objects.filter(
+                user=self.reader
+            ).values_list('post__text', flat=True)),
+            {'Старый пост', 'Второй пост'}
+        )
+        self.author.stats.refresh_from_db()
+        self.assertEqual(self.author.stats.posts_count, 2)
+        self.assertEqual(
+            Post.objects.filter(text='Второй пост').count(), 1
+        )
+        with open(path, 'a', encoding='utf-8') as file:
+            file.write(json.dumps({'author': 'danil', 'text': 'Третий'}))
+        self.run_import(path)
+        self.assertEqual(Post.objects.filter(author=self.author).count(), 3)
+
+    def test_deleted_ids_are_not_reused(self):
+        """Импорт продолжает счетчик id, а не Max(id): id удаленных
+        постов и комментариев не выдаются снова."""
+        post = Post.objects.create(author=self.author, text='Удаленный')
+        comment = Comment.objects.create(
+            post=post, author=self.reader, text='Удаленный'
+        )
+        deleted = (post.id, comment.id)
+        post.delete()
+        path = self.write('posts.jsonl', [json.dumps({
+            'author': 'danil',
+            'text': 'Новый',
+            'comments': [{'author': 'reader', 'text': 'Новый'}],
+        })])
+        self.run_import(path)
+        imported = Post.objects.get(text='Новый')
+        self.assertGreater(imported.id, deleted[0])
+        self.assertGreater(Comment.objects.get(post=imported).id, deleted[1])
+        self.assertGreater(
+            Post.objects.create(author=self.author, text='После').id,
+            imported.id
+        )
+
+    def test_lookup_cache_eviction_keeps_current_chunk(self):
+        User.objects.create(username='third')
+        path = self.write('posts.jsonl', [
+            json.dumps({'author': 'danil', 'text': 'Первый'}),
+            json.dumps({'author': 'reader', 'text': 'Второй'}),
+            json.dumps({'author': 'danil', 'text': 'Третий'}),
+            json.dumps({'author': 'third', 'text': 'Четвертый'}),
+        ])
+        with mock.patch(
+            'posts.management.commands.import_posts.CACHE_SIZE', 2
+        ):
+            errors = self.run_import(path, '--batch-size', '2')
+        self.assertEqual(errors, '')
+        self.assertEqual(
+            Post.objects.filter(text__in=(
+                'Первый', 'Второй', 'Третий', 'Четвертый'
+            )).count(),
+            4
+        )
+
+    def test_import_csv_with_new_users(self):
+        path = self.write('posts.csv', [
+            'author,group,text,pub_date',
+            'newbie,,Пост из CSV,2020-01-01T00:00:00',
+        ])
+        self.run_import(path, '--create-users')
+        post = Post.objects.get(text='Пост из CSV')
+        self.assertEqual(post.author.username, 'newbie')
+        self.assertFalse(post.author.has_usable_password())
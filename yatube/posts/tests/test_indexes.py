@@ -0,0 +1,97 @@
+from unittest import skipUnless
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, User
+from ..paginator import encode_cursor
+
+USERNAME = 'danil'
+GROUP_SLUG = 'test-slug'
+
+
+@skipUnless(connection.vendor == 'sqlite', 'План запроса в формате SQLite')
+class QueryPlanTests(TestCase):
+    """Списки страниц читаются по составным индексам без сортировки."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username=USERNAME)
+        cls.reader = User.objects.create(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug=GROUP_SLUG
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Тестовый пост'
+        )
+        Comment.objects.create(
+            post=cls.post, author=cls.reader, text='Комментарий'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest = Client()
+        self.authorized = Client()
+        self.authorized.force_login(self.reader)
+
+    def plan(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return ' / '.join(row[-1] for row in cursor.fetchall())
+
+    def list_plans(self, client, url, table):
+        """Планы запросов страницы, выбирающих строки table с LIMIT."""
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(client.get(url).status_code, 200)
+        plans = [
+            self.plan(query['sql'])
+            for query in context.captured_queries
+            if f'FROM "{table}" ' in query['sql']
+            and 'LIMIT' in query['sql']
+            and 'ORDER BY' in query['sql']
+        ]
+        self.assertTrue(plans, f'{url} не читает {table}')
+        return plans
+
+    def test_pages_use_composite_indexes(self):
+        after = '?after=' + encode_cursor(self.post.pub_date, self.post.id + 1)
+        cases = [
+            (reverse('posts:index'), 'posts_post', 'posts_post_pub_date'),
+            (
+                reverse('posts:group_list', args=(GROUP_SLUG,)),
+                'posts_post',
+                'post_group_pub_date_idx'
+            ),
+            (
+                reverse('posts:profile', args=(USERNAME,)),
+                'posts_post',
+                'post_author_pub_date_idx'
+            ),
+            (
+                reverse('posts:post_detail', args=(self.post.id,)),
+                'posts_comment',
+                'comment_post_created_idx'
+            ),
+        ]
+        for url, table, index in cases:
+            for page in ('', after):
+                with self.subTest(url=url + page):
+                    for plan in self.list_plans(self.guest, url + page, table):
+                        self.assertIn(index, plan)
+                        self.assertNotIn('TEMP B-TREE', plan)
+        for plan in self.list_plans(
+            self.authorized, reverse('posts:follow_index'), 'posts_feedentry'
+        ):
+            self.assertIn('feed_user_pub_date_idx', plan)
+            self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_followers_lookup_uses_author_index(self):
+        queryset = Follow.objects.filter(
+            author_id=self.author.id
+        ).values_list('user_id', flat=True)
+        plan = self.plan(str(queryset.query))
+        self.assertIn('COVERING INDEX follow_author_user_idx', plan)
@@ -1,7 +1,7 @@
-from django.test import TestCase
+from django.test import TestCase, TransactionTestCase
 
 from ..models import (
-    Comment, Follow, Group, Post, User,
+    AuthorStats, Comment, Follow, Group, Post, User,
     COMMENT_STR_SIZE, POST_STR_SIZE, GROUP_STR_SIZE,
     FOLLOW_STR
 )
@@ -63,3 +63,21 @@ class PostModelTest(TestCase):
                 self.assertEqual(
                     Post._meta.get_field(value).verbose_name, expected
                 )
+
+
+class UserDeleteTest(TransactionTestCase):
+    def test_delete_user_with_posts_comments_and_follows(self):
+        """Удаление автора не пересоздает его строку счетчиков."""
+        user = User.objects.create(username='danil')
+        another_user = User.objects.create(username='leo')
+        post = Post.objects.create(author=user, text='Тестовый пост')
+        Comment.objects.create(post=post, author=user, text='Комментарий')
+        Follow.objects.create(user=user, author=another_user)
+        Follow.objects.create(user=another_user, author=user)
+        user_id = user.pk
+        user.delete()
+        self.assertFalse(AuthorStats.objects.filter(user_id=user_id).exists())
+        stats = AuthorStats.objects.get(user=another_user)
+        self.assertEqual(
+            (stats.followers_count, stats.following_count), (0, 0)
+        )
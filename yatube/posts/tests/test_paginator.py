@@ -1,8 +1,9 @@
+from django.core.cache import cache
 from django.test import TestCase, Client
 from django.urls import reverse
 
-from ..models import Follow, Group, Post, User
-from ..views import POSTS_PER_PAGE
+from ..models import Comment, Follow, Group, Post, User
+from ..queries import COMMENTS_PER_PAGE, POSTS_PER_PAGE
 
 
 USERNAME = 'danil'
@@ -42,6 +43,9 @@ class PaginatorTests(TestCase):
         cls.another = Client()
         cls.another.force_login(cls.another_user)
 
+    def setUp(self):
+        cache.clear()
+
     def test_page_content(self):
         Follow.objects.create(
             user=self.another_user,
@@ -63,3 +67,62 @@ class PaginatorTests(TestCase):
                     len(self.another.get(url).context['page_obj']),
                     posts_count
                 )
+
+    def test_cursor_pages(self):
+        """Курсорные ссылки ведут на соседние страницы без пропусков."""
+        first_response = self.guest.get(INDEX)
+        first = first_response.context['page_obj']
+        self.assertFalse(first.has_previous())
+        self.assertTrue(first.has_next())
+        second_response = self.guest.get(
+            INDEX, {'after': first.next_cursor}
+        )
+        self.assertNotEqual(first_response.content, second_response.content)
+        second = second_response.context['page_obj']
+        self.assertEqual(len(second), self.SECOND_PAGE_POSTS_COUNT)
+        self.assertFalse(second.has_next())
+        self.assertEqual(
+            set(first) & set(second),
+            set()
+        )
+        back = self.guest.get(
+            INDEX, {'before': second.previous_cursor}
+        ).context['page_obj']
+        self.assertEqual(list(back), list(first))
+        self.assertFalse(back.has_previous())
+
+    def test_broken_cursor_shows_first_page(self):
+        self.assertEqual(
+            len(self.guest.get(
+                INDEX, {'after': 'мусор'}
+            ).context['page_obj']),
+            POSTS_PER_PAGE
+        )
+
+    def test_comments_pages(self):
+        """Комментарии выводятся порциями, следующие - отдельным запросом."""
+        post = Post.objects.first()
+        Comment.objects.bulk_create(
+            Comment(post=post, author=self.user, text=f'Комментарий {index}')
+            for index in range(COMMENTS_PER_PAGE + 1)
+        )
+        detail = reverse('posts:post_detail', args=(post.id,))
+        response = self.guest.get(detail)
+        first = response.context['comments']
+        self.assertEqual(len(first), COMMENTS_PER_PAGE)
+        fragment = reverse('posts:post_comments', args=(post.id,))
+        self.assertContains(
+            response, f'data-more-comments="{fragment}?after='
+        )
+        rest = self.guest.get(
+            fragment, {'after': first.next_cursor}
+        ).context['comments']
+        self.assertEqual(len(rest), 1)
+        self.assertFalse(rest.has_next())
+        # Без JavaScript ссылка ведет на страницу поста, а не фрагмент.
+        self.assertContains(
+            response, f'href="{detail}?after={first.next_cursor}#comments"'
+        )
+        response = self.guest.get(detail, {'after': first.next_cursor})
+        self.assertEqual(len(response.context['comments']), 1)
+        self.assertTemplateUsed(response, 'base.html')
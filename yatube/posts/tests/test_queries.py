@@ -0,0 +1,77 @@
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, User
+from ..queries import POSTS_PER_PAGE
+from .query_budget import QueryBudgetMixin
+
+
+USERNAME = 'danil'
+GROUP_SLUG = 'test-slug'
+INDEX = reverse('posts:index')
+PROFILE = reverse('posts:profile', args=(USERNAME,))
+GROUP_LIST = reverse('posts:group_list', args=(GROUP_SLUG,))
+FOLLOW_INDEX = reverse('posts:follow_index')
+# На группе, профиле и посте один запрос уходит на ETag.
+GUEST_BUDGETS = {
+    INDEX: 3,
+    GROUP_LIST: 5,
+    PROFILE: 5,
+}
+AUTHORIZED_BUDGETS = {
+    INDEX: 5,
+    GROUP_LIST: 7,
+    PROFILE: 8,
+    FOLLOW_INDEX: 5,
+}
+POST_DETAIL_BUDGET = 4
+
+
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username=USERNAME)
+        cls.reader = User.objects.create(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug=GROUP_SLUG,
+            description='Тестовое описание',
+        )
+        Follow.objects.create(user=cls.reader, author=cls.user)
+        cls.guest = Client()
+        cls.authorized = Client()
+        cls.authorized.force_login(cls.reader)
+
+    def create_posts(self, count):
+        for index in range(count):
+            post = Post.objects.create(
+                author=self.user,
+                group=self.group,
+                text=f'Запись номер {index}'
+            )
+            Comment.objects.create(
+                post=post, author=self.reader, text='Комментарий'
+            )
+        return post
+
+    def test_budget_does_not_grow_with_page_size(self):
+        """Число запросов не зависит от числа постов на странице."""
+        for posts_count in (1, POSTS_PER_PAGE):
+            Post.objects.all().delete()
+            self.create_posts(posts_count)
+            for client, budgets in (
+                (self.guest, GUEST_BUDGETS),
+                (self.authorized, AUTHORIZED_BUDGETS),
+            ):
+                for url, budget in budgets.items():
+                    with self.subTest(url=url, posts_count=posts_count):
+                        self.assertQueryBudget(client, url, budget)
+
+    def test_post_detail_budget(self):
+        post = self.create_posts(POSTS_PER_PAGE)
+        self.assertQueryBudget(
+            self.guest,
+            reverse('posts:post_detail', args=(post.id,)),
+            POST_DETAIL_BUDGET
+        )
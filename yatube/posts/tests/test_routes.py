@@ -15,9 +15,18 @@ ROUTES_NAMES = [
     ['post_edit', (POST_ID,), f'/posts/{POST_ID}/edit/'],
     ['post_create', None, '/create/'],
     ['add_comment', (POST_ID,), f'/posts/{POST_ID}/comment/'],
+    ['post_comments', (POST_ID,), f'/posts/{POST_ID}/comments/'],
     ['profile_follow', (USERNAME,), f'/profile/{USERNAME}/follow/'],
     ['profile_unfollow', (USERNAME,), f'/profile/{USERNAME}/unfollow/'],
-    ['follow_index', None, '/follow/']
+    ['follow_index', None, '/follow/'],
+    ['search', None, '/search/'],
+    ['profile_export', (USERNAME,), f'/profile/{USERNAME}/export/'],
+    ['posts_rss', None, '/rss/'],
+    ['posts_atom', None, '/atom/'],
+    ['group_rss', (TEST_SLUG,), f'/group/{TEST_SLUG}/rss/'],
+    ['group_atom', (TEST_SLUG,), f'/group/{TEST_SLUG}/atom/'],
+    ['author_rss', (USERNAME,), f'/profile/{USERNAME}/rss/'],
+    ['author_atom', (USERNAME,), f'/profile/{USERNAME}/atom/'],
 ]
 
 
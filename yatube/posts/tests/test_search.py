@@ -0,0 +1,66 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Post, User
+from ..search import FTS_TABLE
+
+SEARCH = reverse('posts:search')
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='danil')
+        cls.cats = Post.objects.create(
+            author=cls.user, text='Кошки и коты любят спать'
+        )
+        cls.dogs = Post.objects.create(
+            author=cls.user, text='Собаки любят гулять'
+        )
+        cls.guest = Client()
+
+    def found(self, query):
+        return list(
+            self.guest.get(SEARCH, {'q': query}).context['page_obj']
+        )
+
+    def test_search_by_words_and_prefixes(self):
+        cases = {
+            'любят': {self.cats, self.dogs},
+            'кошк': {self.cats},
+            'собаки гулять': {self.dogs},
+            'слон': set(),
+            '"*': set(),
+        }
+        for query, expected in cases.items():
+            with self.subTest(query=query):
+                self.assertEqual(set(self.found(query)), expected)
+
+    def test_ranked_by_relevance(self):
+        relevant = Post.objects.create(
+            author=self.user, text='Кошки, кошки и еще раз кошки'
+        )
+        self.assertEqual(self.found('кошки'), [relevant, self.cats])
+
+    def test_index_follows_edits_and_deletes(self):
+        dogs = Post.objects.get(id=self.dogs.id)
+        dogs.text = 'Собаки любят плавать'
+        dogs.save()
+        self.assertEqual(self.found('плавать'), [dogs])
+        self.assertEqual(self.found('гулять'), [])
+        dogs.delete()
+        self.assertEqual(self.found('собаки'), [])
+
+    def test_rebuild_command(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('delete-all')"
+            )
+        self.assertEqual(self.found('кошки'), [])
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(self.found('кошки'), [self.cats])
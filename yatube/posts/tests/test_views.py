@@ -1,9 +1,15 @@
+import time
+from io import StringIO
+
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import Client, TestCase
+from django.core.management import call_command
+from django.test import Client, RequestFactory, TestCase
 from django.urls import reverse
+from django.utils.http import http_date
 
-from ..models import Follow, Group, Post, User
+from ..cache import fragment_key, page_key
+from ..models import AuthorStats, Comment, Follow, Group, Post, User
 
 
 USERNAME = 'danil'
@@ -130,14 +136,15 @@ class PostPagesTests(TestCase):
             )
 
     def test_cache_index_pages(self):
-        """Проверяем работу кэша главной страницы."""
+        """Главная страница берется из кэша, пока посты не менялись."""
+        cache.clear()
         first_response = self.client.get(INDEX)
-        Post.objects.all().delete()
+        Post.objects.update(text='Правка в обход сигналов')
         self.assertEqual(
             first_response.content,
             self.client.get(INDEX).content
         )
-        cache.clear()
+        Post.objects.create(author=self.user, text='Новый пост')
         self.assertNotEqual(
             first_response.content,
             self.client.get(INDEX).content
@@ -168,3 +175,158 @@ class PostPagesTests(TestCase):
                 author=self.another_user
             ).exists()
         )
+
+    def test_follow_feed_inbox(self):
+        """Лента подписок заполняется при подписке, новых постах
+        и очищается при отписке."""
+        self.authorized.get(reverse(
+            'posts:profile_follow', args=(ANOTHER_USERNAME,)
+        ))
+        old_post = Post.objects.create(
+            author=self.another_user, text='Старый пост'
+        )
+        Follow.objects.filter(user=self.user).delete()
+        self.assertNotIn(
+            old_post, self.authorized.get(FOLLOW_INDEX).context['page_obj']
+        )
+        self.authorized.get(FOLLOW)
+        self.assertIn(
+            old_post, self.authorized.get(FOLLOW_INDEX).context['page_obj']
+        )
+        new_post = Post.objects.create(
+            author=self.another_user, text='Новый пост'
+        )
+        self.assertEqual(
+            list(self.authorized.get(FOLLOW_INDEX).context['page_obj']),
+            [new_post, old_post]
+        )
+        self.authorized.get(UNFOLLOW)
+        self.assertEqual(
+            len(self.authorized.get(FOLLOW_INDEX).context['page_obj']), 0
+        )
+
+    def test_author_stats(self):
+        """Счетчики автора следят за постами, комментариями и подписками."""
+        def stats():
+            author = self.authorized.get(PROFILE).context['author']
+            return (
+                author.stats.posts_count,
+                author.stats.followers_count,
+                author.stats.following_count,
+                author.stats.comments_count,
+            )
+        self.assertEqual(stats(), (1, 0, 0, 0))
+        Follow.objects.create(user=self.another_user, author=self.user)
+        Follow.objects.create(user=self.user, author=self.another_user)
+        Comment.objects.create(
+            post=self.post, author=self.user, text='Комментарий'
+        )
+        extra_post = Post.objects.create(author=self.user, text='Еще пост')
+        self.assertEqual(stats(), (2, 1, 1, 1))
+        extra_post.delete()
+        self.assertEqual(stats(), (1, 1, 1, 1))
+        AuthorStats.objects.filter(user=self.user).update(posts_count=100)
+        call_command('reconcile_stats', USERNAME, stdout=StringIO())
+        self.assertEqual(stats(), (1, 1, 1, 1))
+
+    def test_author_stats_not_written_on_read(self):
+        """Строка счетчиков создается с пользователем; без нее страница
+        показывает нули и ничего не пишет."""
+        user = User.objects.create(username='newcomer')
+        self.assertTrue(AuthorStats.objects.filter(user=user).exists())
+        AuthorStats.objects.filter(user=user).delete()
+        response = self.guest.get(
+            reverse('posts:profile', args=(user.username,))
+        )
+        self.assertEqual(response.context['author'].stats.posts_count, 0)
+        self.assertFalse(AuthorStats.objects.filter(user=user).exists())
+        Post.objects.create(author=user, text='Первый пост')
+        self.assertFalse(AuthorStats.objects.filter(user=user).exists())
+        call_command('reconcile_stats', user.username, stdout=StringIO())
+        self.assertEqual(AuthorStats.objects.get(user=user).posts_count, 1)
+
+    def test_page_key_ignores_unused_params(self):
+        """Лишние параметры не создают новых записей в кэше."""
+        factory = RequestFactory()
+        key = page_key(factory.get(INDEX, {'page': 2}))
+        self.assertEqual(
+            page_key(factory.get(f'{INDEX}?utm=1&page=2&x=2')), key
+        )
+        self.assertNotEqual(page_key(factory.get(INDEX, {'page': 3})), key)
+        self.assertNotEqual(page_key(factory.get(INDEX)), key)
+        self.assertEqual(
+            fragment_key(factory.get(f'{INDEX}?x=1')),
+            fragment_key(factory.get(INDEX))
+        )
+
+    def test_anonymous_page_cache(self):
+        """Анонимам страницы отдаются из кэша до правки их содержимого."""
+        cache.clear()
+        urls = (INDEX, PROFILE, GROUP_LIST, self.POST_DETAIL)
+        responses = {url: self.guest.get(url).content for url in urls}
+        Post.objects.update(text='Правка в обход сигналов')
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.guest.get(url).content, responses[url])
+                self.assertNotEqual(
+                    self.authorized.get(url).content, responses[url]
+                )
+        Comment.objects.create(
+            post=self.post, author=self.another_user, text='Комментарий'
+        )
+        self.assertNotEqual(
+            self.guest.get(self.POST_DETAIL).content,
+            responses[self.POST_DETAIL]
+        )
+        self.assertEqual(self.guest.get(INDEX).content, responses[INDEX])
+        post = Post.objects.get(id=self.post.id)
+        post.text = 'Новый текст'
+        post.save()
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertNotEqual(
+                    self.guest.get(url).content, responses[url]
+                )
+
+    def test_conditional_get(self):
+        """Неизмененная страница отдается как 304 и для анонима, и для
+        автора; правка меняет ETag."""
+        cache.clear()
+        for client in (self.guest, self.authorized):
+            for url in (PROFILE, GROUP_LIST, self.POST_DETAIL):
+                with self.subTest(url=url):
+                    etag = client.get(url)['ETag']
+                    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+                    self.assertEqual(response.status_code, 304)
+        etag = self.guest.get(self.POST_DETAIL)['ETag']
+        Comment.objects.create(
+            post=self.post, author=self.another_user, text='Комментарий'
+        )
+        response = self.guest.get(
+            self.POST_DETAIL, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_if_modified_since_after_delete(self):
+        """Удаление не сдвигает дату последней правки вперед, поэтому
+        по If-Modified-Since страница не считается неизмененной."""
+        cache.clear()
+        post = Post.objects.create(
+            author=self.user, group=self.group, text='Удаляемый пост'
+        )
+        comment = Comment.objects.create(
+            post=self.post, author=self.another_user, text='Комментарий'
+        )
+        urls = (PROFILE, GROUP_LIST, self.POST_DETAIL)
+        for url in urls:
+            self.assertNotIn('Last-Modified', self.guest.get(url))
+        since = http_date(time.time() + 60)
+        post.delete()
+        comment.delete()
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.guest.get(url, HTTP_IF_MODIFIED_SINCE=since)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotContains(response, 'Удаляемый пост')
+                self.assertNotContains(response, 'Комментарий')
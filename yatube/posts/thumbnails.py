@@ -0,0 +1,98 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from PIL import Image
+
+from .cache import bump_generation, purge_post
+from .models import Post, PostImageRendition
+
+RENDITION_WIDTHS = (320, 640, 960, 1280)
+RENDITION_QUALITY = 80
+WEBP = 'webp'
+FALLBACK_FORMATS = ('JPEG', 'PNG')
+WORKERS = 2
+
+logger = logging.getLogger(__name__)
+executor = ThreadPoolExecutor(
+    max_workers=WORKERS, thread_name_prefix='thumbnails'
+)
+
+
+def _encode(image, image_format):
+    if image_format == 'JPEG' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    elif image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA')
+    buffer = BytesIO()
+    image.save(buffer, image_format, quality=RENDITION_QUALITY)
+    return buffer.getvalue()
+
+
+def build_renditions(post):
+    """Сохраняет картинку поста в нескольких ширинах, в WebP и исходном
+    формате, и записывает варианты в базу для srcset."""
+    for rendition in post.renditions.all():
+        rendition.file.delete(save=False)
+    post.renditions.all().delete()
+    with post.image.open('rb') as file:
+        original = Image.open(file)
+        original.load()
+    fallback = original.format
+    if fallback not in FALLBACK_FORMATS:
+        fallback = 'PNG'
+    widths = [
+        width for width in RENDITION_WIDTHS if width < original.width
+    ] + [min(original.width, RENDITION_WIDTHS[-1])]
+    name = os.path.splitext(os.path.basename(post.image.name))[0]
+    renditions = []
+    for width in sorted(set(widths)):
+        height = max(1, round(original.height * width / original.width))
+        image = original.resize((width, height), Image.LANCZOS)
+        for image_format in (WEBP.upper(), fallback):
+            rendition = PostImageRendition(
+                post=post,
+                width=width,
+                height=height,
+                format=image_format.lower(),
+            )
+            rendition.file.save(
+                f'{post.id}/{name}-{width}.{image_format.lower()}',
+                ContentFile(_encode(image, image_format)),
+                save=False
+            )
+            renditions.append(rendition)
+    PostImageRendition.objects.bulk_create(renditions)
+
+
+def generate(post_id):
+    """Строит варианты картинки поста и помечает их готовыми."""
+    post = Post.objects.select_related('author').filter(id=post_id).first()
+    if post is None or not post.image:
+        return
+    build_renditions(post)
+    if Post.objects.filter(id=post.id, image=post.image.name).update(
+        thumbnails_ready=True, updated=timezone.now()
+    ):
+        bump_generation()
+        purge_post(post)
+
+
+def _work(post_id):
+    close_old_connections()
+    try:
+        generate(post_id)
+    except Exception:
+        logger.exception('Не удалось построить миниатюры поста %s', post_id)
+    finally:
+        close_old_connections()
+
+
+def queue(post):
+    """Отдает построение миниатюр фоновому потоку после коммита."""
+    if post.image:
+        transaction.on_commit(lambda: executor.submit(_work, post.id))
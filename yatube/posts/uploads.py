@@ -0,0 +1,117 @@
+import tempfile
+from functools import wraps
+
+from django import forms
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.template.defaultfilters import filesizeformat
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from PIL import Image, ImageOps
+
+# Формат загрузки -> формат сохранения. MPO (снимки телефонов с
+# несколькими кадрами) сохраняется как JPEG из первого кадра.
+NORMALIZED_FORMATS = {'JPEG': 'JPEG', 'MPO': 'JPEG', 'PNG': 'PNG',
+                      'WEBP': 'WEBP'}
+NORMALIZED_QUALITY = 90
+
+
+class LimitedTemporaryFileUploadHandler(TemporaryFileUploadHandler):
+    """Пишет загрузку во временный файл кусками и бросает писать после
+    POST_IMAGE_MAX_BYTES: размер файла все равно досчитывается, и форма
+    отклоняет его, не читая."""
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.POST_IMAGE_MAX_BYTES:
+            return None
+        return super().receive_data_chunk(raw_data, start)
+
+
+def limited_uploads(view):
+    """Принимает файлы view через LimitedTemporaryFileUploadHandler.
+
+    Обработчики меняются до чтения тела запроса, а CsrfViewMiddleware
+    читает его раньше view, поэтому CSRF проверяется здесь же, уже
+    после замены. Остальные загрузки сайта обрезать незачем.
+    """
+    protected = csrf_protect(view)
+
+    @csrf_exempt
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        request.upload_handlers = [LimitedTemporaryFileUploadHandler(request)]
+        return protected(request, *args, **kwargs)
+    return wrapper
+
+
+class LimitedImageField(forms.ImageField):
+    """Проверяет размер файла и число пикселей до полного разбора."""
+
+    default_error_messages = {
+        'too_large': 'Файл больше %(limit)s.',
+        'too_many_pixels': 'Картинка больше %(limit)s Мпикс.',
+    }
+
+    def to_python(self, data):
+        if data in self.empty_values:
+            return None
+        max_bytes = settings.POST_IMAGE_MAX_BYTES
+        if data.size > max_bytes:
+            raise forms.ValidationError(
+                self.error_messages['too_large'],
+                code='too_large',
+                params={'limit': filesizeformat(max_bytes)},
+            )
+        try:
+            with Image.open(data) as image:
+                pixels = image.width * image.height
+        except Image.DecompressionBombError:
+            pixels = float('inf')
+        except (OSError, SyntaxError):
+            pixels = 0
+        finally:
+            data.seek(0)
+        max_pixels = settings.POST_IMAGE_MAX_PIXELS
+        if pixels > max_pixels:
+            raise forms.ValidationError(
+                self.error_messages['too_many_pixels'],
+                code='too_many_pixels',
+                params={'limit': f'{max_pixels / 10 ** 6:g}'},
+            )
+        return super().to_python(data)
+
+
+def normalize_image(upload):
+    """Убирает EXIF и уменьшает картинку до POST_IMAGE_MAX_SIDE.
+
+    JPEG и MPO декодируются сразу в ближайшем подходящем масштабе (draft),
+    а поворот по EXIF делается уже над маленькой копией. GIF и прочие
+    форматы остаются как есть, чтобы не терять анимацию.
+    """
+    max_side = settings.POST_IMAGE_MAX_SIDE
+    with Image.open(upload) as image:
+        image_format = image.format
+        if image_format not in NORMALIZED_FORMATS or (
+            'exif' not in image.info and max(image.size) <= max_side
+        ):
+            upload.seek(0)
+            return upload
+        scale = min(1, max_side / max(image.size))
+        image.draft(None, (image.width * scale, image.height * scale))
+        image.thumbnail(
+            (max_side, max_side), Image.LANCZOS, reducing_gap=None
+        )
+        image = ImageOps.exif_transpose(image)
+        output = tempfile.TemporaryFile(dir=settings.FILE_UPLOAD_TEMP_DIR)
+        image.save(
+            output, NORMALIZED_FORMATS[image_format],
+            quality=NORMALIZED_QUALITY
+        )
+    size = output.tell()
+    output.seek(0)
+    return UploadedFile(output, upload.name, upload.content_type, size)
@@ -1,58 +1,87 @@
+from urllib.parse import urlencode
+
 from django.contrib.auth.decorators import login_required
+from django.core.exceptions import PermissionDenied
 from django.core.paginator import Paginator
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 
+from . import export
+from .cache import cache_anonymous_page, conditional_page, fragment_key
 from .forms import PostForm, CommentForm
 from .models import Group, Post, Follow, User
-
-POSTS_PER_PAGE = 10
-
-
-def page_obj(object, request):
-    return Paginator(object, POSTS_PER_PAGE).get_page(request.GET.get('page'))
+from .queries import (
+    POSTS_PER_PAGE, author_post_list, comments_page, feed_page, get_author,
+    get_post, group_post_list, group_state, is_following, page_obj,
+    post_list, post_state, profile_state, with_related,
+)
+from .search import search_posts
+from .uploads import limited_uploads
 
 
+@cache_anonymous_page
 def index(request):
     return render(request, 'posts/index.html', {
-        'page_obj': page_obj(Post.objects.all(), request),
+        'page_obj': page_obj(post_list(), request),
+        'fragment_key': fragment_key(request),
     })
 
 
+@cache_anonymous_page
+@conditional_page(group_state)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
     return render(request, 'posts/group_list.html', {
         'group': group,
-        'page_obj': page_obj(group.posts.all(), request),
+        'page_obj': page_obj(group_post_list(group), request),
     })
 
 
+@cache_anonymous_page
+@conditional_page(profile_state)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    following = (
-        request.user.is_authenticated
-        and request.user != author
-        and Follow.objects.filter(
-            user=request.user, author=author
-        ).exists()
-    )
+    author = get_author(username)
     return render(request, 'posts/profile.html', {
         'author': author,
-        'page_obj': page_obj(author.posts.all(), request),
-        'following': following
+        'page_obj': page_obj(author_post_list(author), request),
+        'following': is_following(request.user, author)
     })
 
 
+@cache_anonymous_page
+@conditional_page(post_state)
 def post_detail(request, post_id):
+    post = get_post(post_id)
     return render(request, 'posts/post_detail.html', {
-        'post': get_object_or_404(
-            Post,
-            id=post_id,
-        ),
+        'post': post,
+        'comments': comments_page(post, request),
         'form': CommentForm(request.POST or None)
     })
 
 
+@cache_anonymous_page
+def post_comments(request, post_id):
+    post = get_object_or_404(Post, id=post_id)
+    return render(request, 'posts/includes/comment_list.html', {
+        'post': post,
+        'comments': comments_page(post, request),
+    })
+
+
+def search(request):
+    query = request.GET.get('q', '').strip()
+    posts = search_posts(with_related(Post.objects.all()), query)
+    return render(request, 'posts/search.html', {
+        'query': query,
+        'page_obj': Paginator(posts, POSTS_PER_PAGE).get_page(
+            request.GET.get('page')
+        ),
+        'page_query': urlencode({'q': query}) + '&',
+    })
+
+
 @login_required
+@limited_uploads
 def post_create(request):
     form = PostForm(
         data=request.POST or None,
@@ -69,6 +98,7 @@ def post_create(request):
 
 
 @login_required
+@limited_uploads
 def post_edit(request, post_id):
     post = get_object_or_404(Post, id=post_id)
     if post.author != request.user:
@@ -108,10 +138,7 @@ def follow_index(request):
         request,
         'posts/follow.html',
         {
-            'page_obj': page_obj(
-                Post.objects.filter(author__following__user=request.user),
-                request
-            )
+            'page_obj': feed_page(request.user, request)
         }
     )
 
@@ -134,3 +161,26 @@ def profile_unfollow(request, username):
         author__username=username
     ).delete()
     return redirect('posts:profile', username=username)
+
+
+@login_required
+def profile_export(request, username):
+    """Все посты и комментарии автора потоком: NDJSON или ZIP с
+    картинками (?format=zip). Доступно самому автору и персоналу."""
+    if request.user.username != username and not request.user.is_staff:
+        raise PermissionDenied
+    author = get_object_or_404(User, username=username)
+    if request.GET.get('format') == 'zip':
+        response = StreamingHttpResponse(
+            export.zip_archive(author), content_type='application/zip'
+        )
+        extension = 'zip'
+    else:
+        response = StreamingHttpResponse(
+            export.ndjson(author), content_type='application/x-ndjson'
+        )
+        extension = 'ndjson'
+    response['Content-Disposition'] = (
+        f'attachment; filename="{author.username}.{extension}"'
+    )
+    return response
@@ -10,7 +10,9 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/2.2/ref/settings/
 """
 
+import hashlib
 import os
+import tempfile
 
 from dotenv import load_dotenv
 
@@ -47,6 +49,7 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
+    'api.apps.ApiConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -57,7 +60,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.routers.ReplicaPinMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -65,6 +70,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware',
+    'core.profiling.ProfilingMiddleware',
 ]
 
 INTERNAL_IPS = [
@@ -96,6 +102,9 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
+# Потоки, в которых ASGI-приложение выполняет middleware и view.
+ASGI_THREADS = int(os.getenv('ASGI_THREADS', 20))
+
 
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
@@ -103,10 +112,62 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'NAME': os.getenv('DB_NAME', os.path.join(BASE_DIR, 'db.sqlite3')),
+        # Соединение живет между запросами своего потока.
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 600)),
+        # Применяются к каждому новому соединению, см. core.db.
+        'PRAGMAS': {
+            'journal_mode': os.getenv('SQLITE_JOURNAL_MODE', 'wal'),
+            'synchronous': os.getenv('SQLITE_SYNCHRONOUS', 'normal'),
+            'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', 256 * 2 ** 20)),
+            # Отрицательное значение - в килобайтах.
+            'cache_size': int(os.getenv('SQLITE_CACHE_SIZE', -64 * 1024)),
+            'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT', 5000)),
+        },
     }
 }
 
+# Реплики только для чтения: DB_REPLICAS=путь1,путь2. Файлы реплик
+# обновляет команда sync_replicas, в тестах реплики смотрят в default.
+DATABASE_REPLICAS = []
+for number, path in enumerate(
+    filter(None, os.getenv('DB_REPLICAS', '').split(',')), 1
+):
+    DATABASE_REPLICAS.append(f'replica{number}')
+    DATABASES[f'replica{number}'] = {
+        **DATABASES['default'],
+        'NAME': path,
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+
+# Сколько секунд после записи чтения пользователя идут в основную базу.
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', 5))
+
+# Метрики запросов: каждый воркер раз в METRICS_FLUSH_INTERVAL секунд
+# пишет снимок в METRICS_DIR, страница /metrics складывает все снимки,
+# обновленные за последние METRICS_FILE_TTL секунд. Без адресов в
+# METRICS_ALLOWED_IPS (через запятую) страница открыта только персоналу:
+# за локальным прокси все запросы пришли бы с 127.0.0.1.
+METRICS_DIR = os.getenv(
+    'METRICS_DIR', os.path.join(tempfile.gettempdir(), 'yatube-metrics')
+)
+METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', 5))
+METRICS_FILE_TTL = float(os.getenv('METRICS_FILE_TTL', 60))
+METRICS_ALLOWED_IPS = list(
+    filter(None, os.getenv('METRICS_ALLOWED_IPS', '').split(','))
+)
+
+# Профили запросов: персонал включает их флагом ?profile=1 или
+# заголовком X-Profile, без флага профилируется 1 запрос из
+# PROFILING_SAMPLE_RATE (0 - никогда). Хранятся PROFILING_KEEP последних.
+PROFILING_DIR = os.getenv(
+    'PROFILING_DIR', os.path.join(tempfile.gettempdir(), 'yatube-profiles')
+)
+PROFILING_SAMPLE_RATE = int(os.getenv('PROFILING_SAMPLE_RATE', 0))
+PROFILING_KEEP = int(os.getenv('PROFILING_KEEP', 50))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -154,6 +215,12 @@ MEDIA_URL = '/media/'
 
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+POST_IMAGE_MAX_BYTES = int(os.getenv('POST_IMAGE_MAX_BYTES', 10 * 2 ** 20))
+
+POST_IMAGE_MAX_PIXELS = int(os.getenv('POST_IMAGE_MAX_PIXELS', 40 * 10 ** 6))
+
+POST_IMAGE_MAX_SIDE = int(os.getenv('POST_IMAGE_MAX_SIDE', 2560))
+
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/2.2/howto/static-files/
 
@@ -161,6 +228,39 @@ STATIC_URL = '/static/'
 
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+        'BACKEND': 'core.cache.TwoTierCache',
+        'LOCATION': 'default',
+        'OPTIONS': {
+            'L2': 'shared',
+            'MAX_ENTRIES': int(os.getenv('CACHE_L1_MAX_ENTRIES', 1000)),
+            'L1_TIMEOUT': int(os.getenv('CACHE_L1_TIMEOUT', 5)),
+            'CHECK_INTERVAL': float(os.getenv('CACHE_CHECK_INTERVAL', 1)),
+        },
+    },
+    # У нескольких процессов L2 должен атомарно выполнять incr
+    # (Memcached, Redis): на нем держится журнал сброса L1. Файловый
+    # кэш по умолчанию годится для одного процесса разработки; каталог
+    # у каждой копии проекта свой.
+    'shared': {
+        'BACKEND': os.getenv(
+            'CACHE_L2_BACKEND',
+            'django.core.cache.backends.filebased.FileBasedCache'
+        ),
+        'LOCATION': os.getenv(
+            'CACHE_L2_LOCATION',
+            os.path.join(
+                tempfile.gettempdir(),
+                'yatube-cache-' + hashlib.md5(BASE_DIR.encode()).hexdigest()[:8]
+            )
+        ),
+    },
 }
+
+# Тесты работают со своими кэшами в памяти.
+TEST_RUNNER = 'core.runner.TestRunner'
+
+THUMBNAIL_KVSTORE = 'posts.kvstore.KVStore'
+
+THUMBNAIL_KVSTORE_PATH = os.getenv(
+    'THUMBNAIL_KVSTORE_PATH', os.path.join(BASE_DIR, 'thumbnails.sqlite3')
+)
@@ -12,6 +12,8 @@ urlpatterns = [
     path('auth/', include('users.urls')),
     path('auth/', include('django.contrib.auth.urls')),
     path('about/', include('about.urls', namespace='about')),
+    path('api/', include('api.urls', namespace='api')),
+    path('', include('core.urls', namespace='core')),
     path('', include('posts.urls', namespace='posts')),
 ]
 